@@ -3,6 +3,8 @@ import pandas as pd
 from thefuzz import process
 from PIL import Image
 import pytesseract
+from catalog import cheapest_alternative, load_catalog
+from layout import stream_lines
 
 # -------------------------------------------------------------------------
 # 1. SETUP & CONFIGURATION
@@ -20,16 +22,18 @@ if 'ocr_results' not in st.session_state:
 # -------------------------------------------------------------------------
 # 2. DATA LOADING
 # -------------------------------------------------------------------------
-@st.cache_data
+SNAPSHOT_PATH = r'F:\pybls\csv files\formatted_medicines_v3.snapshot'
+CSV_PATH = r'F:\pybls\csv files\formatted_medicines_v3.csv'
+
+# cache_resource hands every session and rerun the same objects instead of
+# unpickling a fresh copy each time (cache_data), so never mutate them
+@st.cache_resource
 def load_data():
-    try:
-        df = pd.read_csv(r'F:\pybls\csv files\formatted_medicines_v3.csv')
-        df_clean = df.drop_duplicates(subset=['brand_name'], keep='first')
-        return df, df_clean.set_index('brand_name').to_dict('index')
-    except FileNotFoundError:
-        return None, None
+    # Binary snapshot written by CSV_scrap_chpstBRND.py (memory-mapped, no CSV
+    # parsing) while it matches the CSV; otherwise the CSV itself
+    return load_catalog(SNAPSHOT_PATH, CSV_PATH)
 
-df, medicines = load_data()
+df, medicines, generic_index = load_data()
 
 # -------------------------------------------------------------------------
 # 3. SIDEBAR: BATCH OCR UPLOADER
@@ -44,12 +48,13 @@ if uploaded_file is not None:
         
         if st.sidebar.button("🔍 Analyze Prescription"):
             st.sidebar.write("Processing lines...")
-            raw_text = pytesseract.image_to_string(image)
-            lines = raw_text.split('\n')
+            live_results = st.sidebar.empty()
             found_items = []
             
-            for line in lines:
-                clean_line = line.strip()
+            # Each text line is OCR'd on its own (in parallel) and matched as soon
+            # as it is read, so the first medicines show up before the page is done
+            for line in stream_lines(image.convert('RGB')):
+                clean_line = line['text'].strip()
                 # Basic noise filtering
                 if len(clean_line) < 4: continue
                 if any(x in clean_line.lower() for x in ['date:', 'time:', 'diet:', 'doctor', 'dr.']): continue
@@ -60,6 +65,7 @@ if uploaded_file is not None:
                     best_match, score = match_result
                     if score >= 60:
                         found_items.append(best_match)
+                        live_results.markdown("\n".join(f"- 💊 {item}" for item in dict.fromkeys(found_items)))
             
             if found_items:
                 st.session_state['ocr_results'] = list(set(found_items))
@@ -94,12 +100,12 @@ else:
                 c1.metric("Price", f"৳{current_price:.2f}")
                 
                 # Simple check for the list view
-                alternatives = df[df['generic_name'] == generic]
-                cheapest_row = alternatives.loc[alternatives['price'].idxmin()]
+                cheapest = cheapest_alternative(generic, generic_index, df)
                 
-                if cheapest_row['price'] < current_price:
-                    savings = current_price - cheapest_row['price']
-                    c2.success(f"💡 Switch to **{cheapest_row['brand_name']}** (৳{cheapest_row['price']:.2f}) to save ৳{savings:.2f}")
+                if cheapest and cheapest[1] < current_price:
+                    cheapest_name, cheapest_price = cheapest
+                    savings = current_price - cheapest_price
+                    c2.success(f"💡 Switch to **{cheapest_name}** (৳{cheapest_price:.2f}) to save ৳{savings:.2f}")
                 else:
                     c2.info("✅ Best price available.")
 
@@ -140,12 +146,10 @@ else:
                 col2.write(f"**Generic Formula:** \n{generic}")
 
                 # 3. Restored Smart Logic
-                alternatives = df[df['generic_name'] == generic]
+                cheapest = cheapest_alternative(generic, generic_index, df)
                 
-                if not alternatives.empty:
-                    cheapest_row = alternatives.loc[alternatives['price'].idxmin()]
-                    cheapest_name = cheapest_row['brand_name']
-                    cheapest_price = cheapest_row['price']
+                if cheapest:
+                    cheapest_name, cheapest_price = cheapest
 
                     # Case A: Found a Cheaper Option
                     if cheapest_price < current_price:
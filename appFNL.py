@@ -4,6 +4,14 @@ from thefuzz import process
 from PIL import Image
 import pytesseract
 import re  # <--- Added for the new Logic
+import time
+from catalog import build_strength_index, cheapest_alternative, load_catalog
+from matching import CatalogMatcher
+from ocr_cache import OcrCache
+from ocr_engine import cached_ocr
+from preprocess import decode_upload
+from quality import check_quality, enhance_image, prepare_for_ocr
+from prescription import race_ocr
 
 # -------------------------------------------------------------------------
 # 1. SETUP & CONFIGURATION
@@ -18,16 +26,36 @@ if 'search_input' not in st.session_state:
 if 'ocr_results' not in st.session_state:
     st.session_state['ocr_results'] = [] 
 
-@st.cache_data
+SNAPSHOT_PATH = r'F:\pybls\csv files\formatted_medicines_v3.snapshot'
+CSV_PATH = r'F:\pybls\csv files\formatted_medicines_v3.csv'
+
+# cache_resource hands every session and rerun the same objects instead of
+# unpickling a fresh copy each time (cache_data), so never mutate them
+@st.cache_resource
 def load_data():
-    try:
-        df = pd.read_csv(r'F:\pybls\csv files\formatted_medicines_v3.csv')
-        df_clean = df.drop_duplicates(subset=['brand_name'], keep='first')
-        return df, df_clean.set_index('brand_name').to_dict('index')
-    except FileNotFoundError:
-        return None, None
+    # Binary snapshot written by CSV_scrap_chpstBRND.py (memory-mapped, no CSV
+    # parsing) while it matches the CSV; otherwise the CSV itself
+    return load_catalog(SNAPSHOT_PATH, CSV_PATH)
+
+df, medicines, generic_index = load_data()
+
+@st.cache_resource
+def load_matcher():
+    # normalized catalog names + brand -> strengths, built once and reused
+    frame, names, _ = load_data()
+    if names is None:
+        return None
+    # the snapshot path has no frame; the index then comes from the names
+    return CatalogMatcher(names.keys(), build_strength_index(names.keys() if frame is None else frame))
 
-df, medicines = load_data()
+matcher = load_matcher()
+
+@st.cache_resource
+def load_ocr_cache():
+    # same SQLite file as the Flask app, so a scan OCR'd in either is reused
+    return OcrCache()
+
+ocr_cache = load_ocr_cache()
 
 def extract_medications_from_text(text):
     """
@@ -56,37 +84,62 @@ if uploaded_file is not None:
     try:
         image = Image.open(uploaded_file)
         st.sidebar.image(image, caption='Uploaded Image', use_container_width=True)
+        if 'ocr_timing' in st.session_state:
+            st.sidebar.caption(st.session_state['ocr_timing'])
+        
+        race = st.sidebar.checkbox("🏁 Try several page layouts, keep the best reading (slower)")
         
         if st.sidebar.button("🔍 Analyze Prescription"):
             st.sidebar.write("Processing image...")
             
-            raw_text = pytesseract.image_to_string(image)
-            
-            medication_lines = extract_medications_from_text(raw_text)
+            # Quality gate: a few ms of measurements decide whether the photo is
+            # worth an OCR pass at all, and which preprocessing it needs
+            gray = decode_upload(uploaded_file.getvalue())
+            report = check_quality(gray)
             
-            if not medication_lines:
-                st.sidebar.warning("No medication lines (mg/Tab/Inj) detected.")
+            if not report['ok']:
+                st.session_state.pop('ocr_timing', None)
+                st.sidebar.error(f"🚫 Can't read this photo: {', '.join(report['problems'])}. "
+                                 "Please retake it in good light, flat and in focus.")
             else:
-                st.sidebar.info(f"Scanning {len(medication_lines)} potential lines...")
-                found_items = []
+                # Re-uploads of the same file come straight from the OCR cache
+                start = time.perf_counter()
+                if race:
+                    # PSM 6/4/11 x Otsu/adaptive on a thread pool, most catalog matches wins
+                    raw_text = cached_ocr(uploaded_file.getvalue(), enhance_image(gray, report), variant='race',
+                                          cache=ocr_cache, reader=lambda page: race_ocr(page, matcher))['text']
+                else:
+                    # Otsu for clean scans, denoise + adaptive only when the gate asks for it
+                    raw_text = cached_ocr(uploaded_file.getvalue(), prepare_for_ocr(gray, report),
+                                          variant=f"gate-{report['variant']}", cache=ocr_cache)['text']
+                stats = ocr_cache.stats()
+                st.session_state['ocr_timing'] = (
+                    f"Quality check: {report['ms']:.0f} ms, {report['variant']} preprocessing · "
+                    f"OCR: {(time.perf_counter() - start) * 1000:.0f} ms · cache hit rate "
+                    f"{stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']})")
                 
-                for line in medication_lines:
+                medication_lines = extract_medications_from_text(raw_text)
                 
-                    clean_line = re.sub(r'\d+\+\d+\+\d+', '', line) 
+                if not medication_lines:
+                    st.sidebar.warning("No medication lines (mg/Tab/Inj) detected.")
+                else:
+                    st.sidebar.info(f"Scanning {len(medication_lines)} potential lines...")
+                    found_items = []
                     
-                    match_result = process.extractOne(clean_line, medicines.keys())
+                    clean_lines = [re.sub(r'\d+\+\d+\+\d+', '', line) for line in medication_lines]
                     
-                    if match_result:
-                        best_match, score = match_result
-                        if score >= 60:
+                    # One score matrix for every line instead of an extractOne per line
+                    for match_result in matcher.match_batch(clean_lines, score_cutoff=60):
+                        if match_result:
+                            best_match, score = match_result
                             found_items.append(best_match)
-                
-                if found_items:
-                    st.session_state['ocr_results'] = list(set(found_items))
-                    st.sidebar.success(f"Matched {len(st.session_state['ocr_results'])} medicines!")
-                    st.rerun()
-                else:
-                    st.sidebar.warning("Text detected, but no matching brands found in database.")
+                    
+                    if found_items:
+                        st.session_state['ocr_results'] = list(set(found_items))
+                        st.sidebar.success(f"Matched {len(st.session_state['ocr_results'])} medicines!")
+                        st.rerun()
+                    else:
+                        st.sidebar.warning("Text detected, but no matching brands found in database.")
             
     except Exception as e:
         st.sidebar.error(f"Error: {e}")
@@ -109,12 +162,12 @@ else:
                 c1, c2 = st.columns([1, 2])
                 c1.metric("Price", f"৳{current_price:.2f}")
                 
-                alternatives = df[df['generic_name'] == generic]
-                cheapest_row = alternatives.loc[alternatives['price'].idxmin()]
+                cheapest = cheapest_alternative(generic, generic_index, df)
                 
-                if cheapest_row['price'] < current_price:
-                    savings = current_price - cheapest_row['price']
-                    c2.success(f"💡 Switch to **{cheapest_row['brand_name']}** (৳{cheapest_row['price']:.2f}) to save ৳{savings:.2f}")
+                if cheapest and cheapest[1] < current_price:
+                    cheapest_name, cheapest_price = cheapest
+                    savings = current_price - cheapest_price
+                    c2.success(f"💡 Switch to **{cheapest_name}** (৳{cheapest_price:.2f}) to save ৳{savings:.2f}")
                 else:
                     c2.info("✅ Best price available.")
 
@@ -133,7 +186,21 @@ else:
     )
 
     if user_input:
-        match_result = process.extractOne(user_input.lower(), medicines.keys())
+        start = time.perf_counter()
+        # Brand (exact/typo) + numeric strength first, fuzzy cascade otherwise
+        match_result = matcher.fast_match(user_input, score_cutoff=60)
+        if match_result is None:
+            match_result = matcher.match_one(user_input, score_cutoff=0)
+        search_ms = (time.perf_counter() - start) * 1000
+        st.caption(f"⏱️ Search took {search_ms:.1f} ms · "
+                   f"{matcher.fast_path_rate:.0%} of searches served by the brand/strength fast path")
+        
+        # Old path kept for comparison: WRatio over every catalog name
+        if st.checkbox("Compare with full extractOne scan", key="compare_search"):
+            start = time.perf_counter()
+            process.extractOne(user_input.lower(), medicines.keys())
+            full_ms = (time.perf_counter() - start) * 1000
+            st.caption(f"Full scan took {full_ms:.1f} ms ({full_ms / search_ms:.1f}x slower)")
         
         if match_result:
             best_match, score = match_result
@@ -150,12 +217,10 @@ else:
                 col1.metric("Current Price", f"৳{current_price:.2f}")
                 col2.write(f"**Generic Formula:** \n{generic}")
 
-                alternatives = df[df['generic_name'] == generic]
+                cheapest = cheapest_alternative(generic, generic_index, df)
                 
-                if not alternatives.empty:
-                    cheapest_row = alternatives.loc[alternatives['price'].idxmin()]
-                    cheapest_name = cheapest_row['brand_name']
-                    cheapest_price = cheapest_row['price']
+                if cheapest:
+                    cheapest_name, cheapest_price = cheapest
 
                     if cheapest_price < current_price:
                         savings = current_price - cheapest_price
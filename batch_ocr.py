@@ -0,0 +1,121 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from PIL import Image
+
+import ocr_engine
+from catalog import shared_catalog
+from matching import CatalogMatcher
+from prescription import cascade_ocr, extract_medications, match_medications, preprocess_image
+
+# -------------------------------------------------------------------------
+# Headless batch run: a folder of prescriptions -> JSONL, one line per image
+# -------------------------------------------------------------------------
+IMAGE_TYPES = ('.png', '.jpg', '.jpeg')
+STAGES = ('load', 'preprocess', 'ocr', 'extract', 'match')
+
+_worker = {}
+
+def init_worker(snapshot_path, csv_path, config, cascade=False):
+    """Runs once per pool process: catalog, matcher and OCR engine stay loaded."""
+    # one Tesseract thread and one engine per process, the pool gives the parallelism
+    ocr_engine.set_thread_limit(1)
+    os.environ['OCR_POOL_SIZE'] = '1'
+    catalog = shared_catalog(snapshot_path, csv_path)
+    _worker['catalog'] = catalog
+    _worker['matcher'] = CatalogMatcher(catalog.keys())
+    _worker['config'] = config
+    _worker['cascade'] = cascade
+    ocr_engine.warm_up(config)
+
+def process_image(path):
+    """preprocess -> OCR -> extract_medications -> catalog match, with stage timings."""
+    timings = {}
+    start = time.perf_counter()
+    try:
+        image = Image.open(path).convert('RGB')
+        timings['load'] = time.perf_counter() - start
+
+        if _worker['cascade']:
+            # the cascade preprocesses per pass, so it is all timed as OCR
+            start = time.perf_counter()
+            text = cascade_ocr(image, _worker['matcher'])['text']
+            timings['ocr'] = time.perf_counter() - start
+        else:
+            start = time.perf_counter()
+            processed = preprocess_image(image)
+            timings['preprocess'] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            text = ocr_engine.image_to_string(processed, config=_worker['config'])
+            timings['ocr'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        medications = extract_medications(text)
+        timings['extract'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matches = match_medications(medications, _worker['catalog'], _worker['matcher'])
+        timings['match'] = time.perf_counter() - start
+    except Exception as e:
+        return {'image': path, 'error': str(e), 'timings': timings}
+
+    return {'image': path, 'text': text, 'medications': medications,
+            'matches': matches, 'timings': timings}
+
+def find_images(paths):
+    images = []
+    for path in paths:
+        if os.path.isdir(path):
+            images.extend(sorted(name for name in glob.glob(os.path.join(path, '*'))
+                                 if name.lower().endswith(IMAGE_TYPES)))
+        else:
+            images.append(path)
+    return images
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR a folder of prescriptions and match them to the catalog.")
+    parser.add_argument("paths", nargs='+', help="image files or folders (e.g. 'exmpl prscrptn')")
+    parser.add_argument("--out", help="JSONL output file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--config", default='--psm 6 -l eng', help="Tesseract config")
+    parser.add_argument("--cascade", action="store_true",
+                        help="re-read weak lines with the heavy (ts4) preprocessing")
+    parser.add_argument("--snapshot", default=r'F:\pybls\csv files\formatted_medicines_v3.snapshot')
+    parser.add_argument("--catalog", default=r'F:\pybls\csv files\formatted_medicines_v3.csv')
+    args = parser.parse_args()
+
+    images = find_images(args.paths)
+    if not images:
+        parser.error("no .png/.jpg images found")
+
+    out = open(args.out, 'w', encoding='utf-8') if args.out else sys.stdout
+    totals = dict.fromkeys(STAGES, 0.0)
+    failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.snapshot, args.catalog, args.config, args.cascade)) as pool:
+        futures = [pool.submit(process_image, path) for path in images]
+        # stream results as they finish, not in input order
+        for future in as_completed(futures):
+            result = future.result()
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            out.flush()
+            failed += 'error' in result
+            for stage, seconds in result['timings'].items():
+                totals[stage] += seconds
+    elapsed = time.perf_counter() - start
+    if args.out:
+        out.close()
+
+    stage_report = ', '.join(f"{stage} {totals[stage] / len(images) * 1000:.0f}ms" for stage in STAGES)
+    print(f"Processed {len(images)} images ({failed} failed) with {args.workers} workers "
+          f"in {elapsed:.1f}s: {len(images) / elapsed:.2f} images/s", file=sys.stderr)
+    print(f"Mean per image: {stage_report}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
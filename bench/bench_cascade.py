@@ -0,0 +1,60 @@
+import os
+import sys
+import glob
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pandas as pd
+from PIL import Image
+import ocr_engine
+from matching import CatalogMatcher
+from prescription import (HEAVY_CONFIG, cascade_ocr, extract_medications, preprocess_heavy,
+                          preprocess_image)
+
+# -------------------------------------------------------------------------
+# Benchmark: OCR compute of fast-only, heavy-everywhere (ts4) and the
+# cascade on the sample prescriptions, plus which catalog matches each finds
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.png')))
+
+matcher = CatalogMatcher(pd.read_csv(CSV_PATH)['brand_name'].drop_duplicates())
+images = [Image.open(path).convert('RGB') for path in IMAGES]
+ocr_engine.warm_up()
+
+def matches(text):
+    found = set()
+    for line in extract_medications(text):
+        result = matcher.match_one(line, score_cutoff=60)
+        if result:
+            found.add(result[0])
+    return found
+
+def fast(image):
+    return ocr_engine.image_to_string(preprocess_image(image), '--psm 6 -l eng')
+
+def heavy(image):
+    return ocr_engine.image_to_string(preprocess_heavy(image), '--oem 1 --psm 6 -l eng')
+
+found = {}
+for label, run in (('fast only (Otsu)', fast), ('heavy everywhere (ts4)', heavy),
+                   ('cascade', lambda image: cascade_ocr(image, matcher)['text'])):
+    start = time.perf_counter()
+    texts = [run(image) for image in images]
+    elapsed = (time.perf_counter() - start) / len(images) * 1000
+    found[label] = [matches(text) for text in texts]
+    total = sum(len(m) for m in found[label])
+    print(f"{label:24}: {elapsed:8.1f} ms / image, {total} matched lines")
+
+stats = [cascade_ocr(image, matcher)['stats'] for image in images]
+print(f"cascade re-read {sum(s['rerun_lines'] for s in stats)}/{sum(s['lines'] for s in stats)} lines "
+      f"({sum(s['heavy_pixel_share'] for s in stats) / len(stats):.0%} of pixels), "
+      f"kept heavy text for {sum(s['replaced_lines'] for s in stats)}")
+for label in ('fast only (Otsu)', 'heavy everywhere (ts4)'):
+    same = sum(a == b for a, b in zip(found['cascade'], found[label]))
+    covered = sum(len(b & a) for a, b in zip(found['cascade'], found[label]))
+    print(f"cascade vs {label}: identical on {same}/{len(images)} images, "
+          f"{covered}/{sum(len(b) for b in found[label])} of its matches found")
+print(f"(heavy single-line config: {HEAVY_CONFIG})")
@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pandas as pd
+from catalog import Catalog, build_generic_index, cheapest_alternative
+
+# -------------------------------------------------------------------------
+# Memory report: per-row dict (to_dict('index')) vs compact Catalog
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+LOOKUPS = 20_000
+
+df = pd.read_csv(CSV_PATH)
+
+def traced(build):
+    """(result, MB still allocated) for building the structure from df."""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1e6
+
+def dict_catalog():
+    df_clean = df.drop_duplicates(subset=['brand_name'], keep='first')
+    return df_clean.set_index('brand_name').to_dict('index'), build_generic_index(df)
+
+(medicines, generic_index), dict_mb = traced(dict_catalog)
+catalog, compact_mb = traced(lambda: Catalog.from_frame(df))
+
+print(f"dict catalog + generic index: {dict_mb:6.1f} MB")
+print(f"compact Catalog:              {compact_mb:6.1f} MB ({dict_mb / compact_mb:.1f}x smaller)")
+
+names = [name for name in medicines if isinstance(name, str)]
+for label, table, ranking in (('dict', medicines, generic_index), ('Catalog', catalog, catalog.generic_index)):
+    start = time.perf_counter()
+    for i in range(LOOKUPS):
+        data = table[names[i % len(names)]]
+        cheapest_alternative(data['generic_name'], ranking)
+    elapsed = (time.perf_counter() - start) / LOOKUPS * 1e6
+    print(f"{label:8} price + cheapest lookup: {elapsed:.1f} us")
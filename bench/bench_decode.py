@@ -0,0 +1,99 @@
+import os
+import sys
+import glob
+import io
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import cv2
+import numpy as np
+import pandas as pd
+from PIL import Image
+import ocr_engine
+from matching import CatalogMatcher
+from preprocess import decode_upload
+from prescription import extract_medications
+
+# -------------------------------------------------------------------------
+# Benchmark: tsrct3's upload path (PIL decode -> RGB array -> gray -> Otsu ->
+# OCR) vs decode_upload (reduced grayscale JPEG decode -> Otsu -> raw buffer
+# to the engine) on 12 MP JPEGs made from the sample photos
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')))
+SIZE_12MP = (3024, 4032)
+CONFIG = '--psm 6 -l eng'
+ROUNDS = 3
+
+def otsu(gray):
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+def old_path(data):
+    # what tsrct3 did: every step materializes another full-size buffer
+    image = Image.open(io.BytesIO(data))
+    rgb = np.array(image)
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    return [rgb, gray, otsu(gray)]
+
+def new_path(data):
+    gray = decode_upload(data)
+    return [gray, otsu(gray)]
+
+def measure(path, data):
+    tracemalloc.start()
+    start = time.perf_counter()
+    buffers = path(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, buffers
+
+def matches(matcher, text):
+    return {result[0] for result in
+            (matcher.match_one(line, score_cutoff=60) for line in extract_medications(text)) if result}
+
+def main():
+    matcher = CatalogMatcher(pd.read_csv(CSV_PATH)['brand_name'].drop_duplicates())
+    backend = ocr_engine.get_backend()
+    ocr_engine.warm_up(CONFIG)
+    uploads = []
+    for path in IMAGES:
+        big = cv2.resize(cv2.imread(path), SIZE_12MP, interpolation=cv2.INTER_CUBIC)
+        uploads.append(cv2.imencode('.jpg', big, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes())
+
+    totals = {}
+    found = {}
+    for label, path in (('PIL + RGB array', old_path), ('decode_upload', new_path)):
+        prep, ocr, peaks = [], [], []
+        found[label] = []
+        for data in uploads:
+            for _ in range(ROUNDS):
+                elapsed, peak, buffers = measure(path, data)
+                prep.append(elapsed)
+                peaks.append(peak)
+            start = time.perf_counter()
+            text = ocr_engine.image_to_string(buffers[-1], CONFIG)
+            ocr.append(time.perf_counter() - start)
+            found[label].append(matches(matcher, text))
+        totals[label] = (buffers, prep, ocr, peaks)
+    # tracemalloc sees NumPy/OpenCV buffers; PIL's own decode buffer comes on top of the old path
+
+    print(f"{len(uploads)} x 12 MP JPEG ({np.mean([len(d) for d in uploads]) / 1e6:.1f} MB each), "
+          f"OCR backend: {backend.name}")
+    for label, (buffers, prep, ocr, peaks) in totals.items():
+        sizes = ' + '.join(f"{b.nbytes / 1e6:.1f}" for b in buffers)
+        print(f"{label:16}: decode+preprocess {np.mean(prep) * 1000:7.1f} ms, OCR {np.mean(ocr) * 1000:7.1f} ms / image; "
+              f"{len(buffers)} image buffers ({sizes} MB), traced peak {np.mean(peaks) / 1e6:5.1f} MB, "
+              f"{buffers[-1].shape[1]}x{buffers[-1].shape[0]} to OCR, {sum(map(len, found[label]))} matched medicines")
+    a, b = found.values()
+    print(f"identical catalog matches on {sum(x == y for x, y in zip(a, b))}/{len(uploads)} images, "
+          f"{sum(len(x & y) for x, y in zip(a, b))}/{sum(map(len, a))} of the old path's matches kept")
+    if backend.name == 'pytesseract':
+        print("(pytesseract still writes each image to a temp file for the tesseract process; "
+              "tesserocr takes the grayscale buffer directly)")
+
+if __name__ == "__main__":
+    main()
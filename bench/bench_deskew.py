@@ -0,0 +1,65 @@
+import os
+import sys
+import glob
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import cv2
+import numpy as np
+import pandas as pd
+import ocr_engine
+from matching import CatalogMatcher
+from orientation import estimate_orientation, rotate, straighten
+from prescription import extract_medications
+
+# -------------------------------------------------------------------------
+# Benchmark: tsrct3's Otsu pass with and without the orientation stage on
+# the sample photos, as shot and tilted / turned: stage cost, turns found,
+# catalog matches from a single OCR pass
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', 'Screenshot 2026-01-18*.png')))
+CONFIG = '--psm 6 -l eng'
+POSES = {
+    'as shot': lambda gray: gray,
+    'tilted +8': lambda gray: rotate(gray, 8),
+    'tilted -5': lambda gray: rotate(gray, -5),
+    'sideways': lambda gray: cv2.rotate(gray, cv2.ROTATE_90_CLOCKWISE),
+    'upside down': lambda gray: cv2.rotate(gray, cv2.ROTATE_180),
+}
+# quarter turns clockwise that undo each pose
+EXPECTED_TURNS = {'as shot': 0, 'tilted +8': 0, 'tilted -5': 0, 'sideways': 3, 'upside down': 2}
+
+def otsu(gray):
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+def main():
+    matcher = CatalogMatcher(pd.read_csv(CSV_PATH)['brand_name'].drop_duplicates())
+    ocr_engine.warm_up(CONFIG)
+
+    def read(gray):
+        text = ocr_engine.image_to_string(otsu(gray), CONFIG)
+        return len({result[0] for result in
+                    (matcher.match_one(line, score_cutoff=60) for line in extract_medications(text)) if result})
+
+    pages = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in IMAGES]
+    for pose, make in POSES.items():
+        plain = levelled = right = 0
+        stage_ms = []
+        for page in pages:
+            gray = make(page)
+            orientation = estimate_orientation(gray)
+            start = time.perf_counter()
+            fixed = straighten(gray, orientation)
+            stage_ms.append(orientation['ms'] + (time.perf_counter() - start) * 1000)
+            right += orientation['turns'] == EXPECTED_TURNS[pose]
+            plain += read(gray)
+            levelled += read(fixed)
+        print(f"{pose:12}: {plain:3} matched medicines as is, {levelled:3} after the stage; "
+              f"right turn on {right}/{len(pages)}, stage {np.mean(stage_ms):5.1f} ms / image")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import os
+import sys
+import glob
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from PIL import Image
+import ocr_engine
+
+# -------------------------------------------------------------------------
+# Benchmark: EasyOCR model load vs steady-state latency, one image per
+# recognition call vs all line crops of a batch in one call (needs easyocr)
+# -------------------------------------------------------------------------
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.png')))
+images = [Image.open(path).convert('RGB') for path in IMAGES]
+
+backend = ocr_engine.EasyOcrBackend()
+start = time.perf_counter()
+backend.preload()
+print(f"{'model load (once)':24}: {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+backend.image_to_data(images[0])  # first call pays torch's lazy init
+start = time.perf_counter()
+for image in images:
+    backend.image_to_data(image)
+print(f"{'one image per call':24}: {(time.perf_counter() - start) / len(images) * 1000:8.1f} ms / image")
+
+start = time.perf_counter()
+backend.images_to_data(images)
+print(f"{'batched recognition':24}: {(time.perf_counter() - start) / len(images) * 1000:8.1f} ms / image")
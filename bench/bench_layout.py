@@ -0,0 +1,52 @@
+import os
+import sys
+import glob
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pandas as pd
+from PIL import Image
+import ocr_engine
+from layout import layout_ocr
+from matching import CatalogMatcher
+from prescription import extract_medications, preprocess_image
+
+# -------------------------------------------------------------------------
+# Benchmark: full-page OCR vs layout stage + Rx-body line crops on the
+# sample photos: pixels sent to Tesseract, time per image, catalog matches
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.png')))
+
+matcher = CatalogMatcher(pd.read_csv(CSV_PATH)['brand_name'].drop_duplicates())
+images = [Image.open(path).convert('RGB') for path in IMAGES]
+ocr_engine.warm_up()
+
+def matches(text):
+    found = set()
+    for line in extract_medications(text):
+        result = matcher.match_one(line, score_cutoff=60)
+        if result:
+            found.add(result[0])
+    return found
+
+start = time.perf_counter()
+full = [ocr_engine.image_to_string(preprocess_image(image), '--psm 6 -l eng') for image in images]
+full_ms = (time.perf_counter() - start) / len(images) * 1000
+
+start = time.perf_counter()
+regions = [layout_ocr(image) for image in images]
+layout_ms = (time.perf_counter() - start) / len(images) * 1000
+
+share = sum(result['stats']['pixel_share'] for result in regions) / len(regions)
+fallbacks = sum(result['stats']['fallback'] for result in regions)
+full_found = [matches(text) for text in full]
+layout_found = [matches(result['text']) for result in regions]
+kept = sum(len(a & b) for a, b in zip(full_found, layout_found))
+print(f"full page  : {full_ms:8.1f} ms / image, 100% of pixels, "
+      f"{sum(map(len, full_found))} matched medicines")
+print(f"Rx body    : {layout_ms:8.1f} ms / image, {share:4.0%} of pixels "
+      f"({fallbacks} full-page fallbacks), {sum(map(len, layout_found))} matched medicines")
+print(f"Rx body keeps {kept}/{sum(map(len, full_found))} of the full-page matches")
@@ -0,0 +1,50 @@
+import os
+import sys
+import glob
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pandas as pd
+from PIL import Image
+import ocr_engine
+from layout import stream_lines
+from matching import CatalogMatcher
+
+# -------------------------------------------------------------------------
+# Benchmark: time to the first matched medicine and to the last line,
+# whole-page OCR + split('\n') (app6 before) vs streamed per-line OCR
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')))
+
+matcher = CatalogMatcher(pd.read_csv(CSV_PATH)['brand_name'].drop_duplicates())
+ocr_engine.warm_up()
+
+def match(text):
+    return len(text.strip()) >= 4 and matcher.match_one(text, score_cutoff=60)
+
+def whole_page(image):
+    start = time.perf_counter()
+    first = None
+    for line in ocr_engine.image_to_string(image).split('\n'):
+        if match(line) and first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+def streamed(image):
+    start = time.perf_counter()
+    first = None
+    for line in stream_lines(image):
+        if match(line['text']) and first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+for label, run in (('whole page + split', whole_page), ('streamed lines', streamed)):
+    firsts, totals = [], []
+    for path in IMAGES:
+        first, total = run(Image.open(path).convert('RGB'))
+        firsts.append(first if first is not None else total)
+        totals.append(total)
+    print(f"{label:20}: first match {sum(firsts) / len(firsts) * 1000:7.0f} ms, "
+          f"all lines {sum(totals) / len(totals) * 1000:7.0f} ms (mean per image, {os.cpu_count()} cores)")
@@ -0,0 +1,140 @@
+import os
+import sys
+import random
+import time
+import pandas as pd
+from thefuzz import process
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from catalog import build_strength_index, query_numbers, split_brand_strength
+from matching import CatalogMatcher
+
+# -------------------------------------------------------------------------
+# Benchmark: per-line extractOne vs one batch score matrix per prescription
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+PRESCRIPTIONS = 10
+LINES_PER_RX = 8
+
+def fake_ocr_line(name, rng):
+    """Catalog name with a few OCR-style character errors and a dose pattern."""
+    chars = list(name)
+    for _ in range(rng.randint(0, 3)):
+        i = rng.randrange(len(chars))
+        chars[i] = rng.choice('il1o0. ')
+    return f"Tab. {''.join(chars)} 1+0+1"
+
+df = pd.read_csv(CSV_PATH)
+medicines = df.drop_duplicates(subset=['brand_name'], keep='first').set_index('brand_name').to_dict('index')
+
+start = time.perf_counter()
+matcher = CatalogMatcher(medicines.keys())
+print(f"Matcher build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+rng = random.Random(42)
+names = matcher.names
+sources = [[rng.choice(names) for _ in range(LINES_PER_RX)] for _ in range(PRESCRIPTIONS)]
+prescriptions = [[fake_ocr_line(name, rng) for name in rx] for rx in sources]
+
+old_time, new_time, mismatches, score_diffs, old_right, new_right, not_match_one = 0.0, 0.0, 0, 0, 0, 0, 0
+for lines, rx in zip(prescriptions, sources):
+    start = time.perf_counter()
+    expected = []
+    for line in lines:
+        match_result = process.extractOne(line, medicines.keys())
+        if match_result and match_result[1] >= 60:
+            expected.append((match_result[0], match_result[1]))
+        else:
+            expected.append(None)
+    old_time += time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = matcher.match_batch(lines, score_cutoff=60)
+    new_time += time.perf_counter() - start
+
+    # per line, match_batch must be exactly match_one
+    not_match_one += sum(b != matcher.match_one(line, score_cutoff=60) for b, line in zip(got, lines))
+    mismatches += sum(a != b for a, b in zip(expected, got))
+    # only trigram candidates are scored: on equal best scores ("Tab. ..."
+    # lines tie often) the full scan may pick a tied name outside them
+    score_diffs += sum((a and a[1]) != (b and b[1]) for a, b in zip(expected, got))
+    old_right += sum(bool(a) and a[0] == name for a, name in zip(expected, rx))
+    new_right += sum(bool(b) and b[0] == name for b, name in zip(got, rx))
+
+print(f"extractOne loop: {old_time / PRESCRIPTIONS * 1000:.1f} ms / prescription")
+print(f"match_batch:     {new_time / PRESCRIPTIONS * 1000:.1f} ms / prescription")
+print(f"Speedup: {old_time / new_time:.1f}x   differs from match_one: {not_match_one}; vs extractOne: "
+      f"{score_diffs} score differences, {mismatches} other (tied) picks; right medicine: "
+      f"extractOne {old_right}, match_batch {new_right} of {PRESCRIPTIONS * LINES_PER_RX}")
+
+# -------------------------------------------------------------------------
+# Manual search: extractOne vs two-stage match_one (trigram candidates -> WRatio)
+# -------------------------------------------------------------------------
+def typed_query(name, rng):
+    """Brand (maybe with strength) typed in lowercase with a typo or two."""
+    words = name.lower().split(' ')
+    chars = list(' '.join(words[:rng.choice([1, 2])]))
+    for _ in range(rng.randint(0, 2)):
+        i = rng.randrange(len(chars))
+        chars[i] = rng.choice('aeiou')
+    return ''.join(chars)
+
+queries = [typed_query(rng.choice(names), rng) for _ in range(50)]
+
+old_time, new_time, score_diffs = 0.0, 0.0, 0
+for query in queries:
+    start = time.perf_counter()
+    expected = process.extractOne(query, medicines.keys())
+    old_time += time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = matcher.match_one(query, score_cutoff=0)
+    new_time += time.perf_counter() - start
+
+    if got is None or got[1] != expected[1]:
+        score_diffs += 1
+
+print(f"extractOne search: {old_time / len(queries) * 1000:.1f} ms / query")
+print(f"match_one search:  {new_time / len(queries) * 1000:.1f} ms / query")
+print(f"Speedup: {old_time / new_time:.1f}x   best-score differences: {score_diffs}/{len(queries)}")
+
+# -------------------------------------------------------------------------
+# Typo fast path: share of typed queries resolved by the deletion dictionary
+# -------------------------------------------------------------------------
+start = time.perf_counter()
+for query in queries:
+    if matcher.fast_match(query) is None:
+        matcher.match_one(query, score_cutoff=0)
+fast_time = time.perf_counter() - start
+
+print(f"fast_match + fallback: {fast_time / len(queries) * 1000:.2f} ms / query, "
+      f"fast path served {matcher.fast_hits}/{matcher.lookups} ({matcher.fast_path_rate:.0%})")
+
+# -------------------------------------------------------------------------
+# Brand + strength queries ("tivizid 300"): wrong-strength picks
+# -------------------------------------------------------------------------
+strength_matcher = CatalogMatcher(medicines.keys(), build_strength_index(df))
+print(f"Fuzzy brand search space: {len(strength_matcher.brand_keys)} brands "
+      f"vs {len(strength_matcher.names)} names")
+
+strength_queries = []
+while len(strength_queries) < 50:
+    brand, strength = split_brand_strength(rng.choice(names))
+    numbers = query_numbers(strength or '')
+    if numbers:
+        strength_queries.append((f"{typed_query(brand, rng)} {numbers[-1]:g}", numbers[-1]))
+
+def wrong_strength(result, number):
+    return result is None or number not in query_numbers(split_brand_strength(result[0])[1] or '')
+
+old_wrong = sum(wrong_strength(process.extractOne(query, medicines.keys()), number)
+                for query, number in strength_queries)
+start = time.perf_counter()
+new_wrong = sum(wrong_strength(strength_matcher.fast_match(query) or strength_matcher.match_one(query), number)
+                for query, number in strength_queries)
+strength_time = time.perf_counter() - start
+
+print(f"Wrong or missing strength: extractOne {old_wrong}/{len(strength_queries)}, "
+      f"brand/strength path {new_wrong}/{len(strength_queries)} "
+      f"({strength_time / len(strength_queries) * 1000:.2f} ms / query)")
@@ -0,0 +1,106 @@
+import os
+import sys
+import glob
+import io
+import itertools
+import random
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import cv2
+import numpy as np
+from PIL import Image, ImageEnhance
+from layout import find_text_lines, select_rx_body
+from near_duplicates import DEFAULT_THRESHOLD, MultiIndexHash, hamming, phash, rx_body
+
+# -------------------------------------------------------------------------
+# Benchmark: whole-page vs Rx-body pHash on the sample scans (re-shots,
+# different scans, the same pad with half the lines erased or the lines
+# reordered), and lookup time with 100k stored analyses (multi-index
+# hashing vs a linear scan)
+# -------------------------------------------------------------------------
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.png')))
+HISTORY = 100_000
+QUERIES = 200
+
+def preprocess_image(image):
+    """Same Otsu preprocessing as tsrct3.py (without the deskew)."""
+    gray = cv2.cvtColor(np.array(image.convert('RGB')), cv2.COLOR_RGB2GRAY)
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+def reshoots(image):
+    """Re-compressed, cropped, darker and downscaled copies of a scan."""
+    w, h = image.size
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, 'JPEG', quality=40)
+    return [Image.open(buffer),
+            image.crop((int(w * .03), int(h * .03), int(w * .97), int(h * .97))),
+            ImageEnhance.Brightness(image.convert('RGB')).enhance(0.7),
+            image.resize((w // 2, h // 2))]
+
+def body_lines(page):
+    return select_rx_body(find_text_lines(page), page.shape[1])
+
+def erase_half(page):
+    """Same pad, fewer medicines: every other Rx-body line whited out."""
+    page = page.copy()
+    for x, y, w, h in body_lines(page)[1::2]:
+        page[y:y + h, x:x + w] = 255
+    return page
+
+def reorder(page):
+    """Same medicines in another order: the Rx-body line bands reversed."""
+    boxes = body_lines(page)
+    if len(boxes) < 2:
+        return page
+    left, right = min(b[0] for b in boxes), max(b[0] + b[2] for b in boxes)
+    bands = [page[y:y + h, left:right].copy() for _, y, _, h in boxes]
+    out = page.copy()
+    for (_, y, _, h), band in zip(boxes, reversed(bands)):
+        out[y:y + h, left:right] = 255
+        rows = min(h, band.shape[0])
+        out[y:y + rows, left:right] = band[:rows]
+    return out
+
+pages = [preprocess_image(Image.open(path)) for path in IMAGES]
+edits = {'half the lines erased': erase_half, 'lines reordered': reorder}
+for region, crop in (('whole page', lambda page: page), ('Rx body', rx_body)):
+    hashes = [phash(crop(page)) for page in pages]
+    same = [hamming(phash(crop(preprocess_image(copy))), hashes[i])
+            for i, path in enumerate(IMAGES) for copy in reshoots(Image.open(path))]
+    different = [hamming(a, b) for a, b in itertools.combinations(hashes, 2)]
+    print(f"{region}: re-shots max {max(same)} bits apart "
+          f"({sum(d <= DEFAULT_THRESHOLD for d in same)}/{len(same)} within threshold {DEFAULT_THRESHOLD}), "
+          f"different scans min {min(different)}")
+    for label, edit in edits.items():
+        moved = [hamming(phash(crop(edit(page))), value) for page, value in zip(pages, hashes)]
+        print(f"    {label:22}: {', '.join(map(str, moved))} bits "
+              f"({sum(d <= DEFAULT_THRESHOLD for d in moved)}/{len(moved)} would look like the same paper)")
+
+rng = random.Random(3)
+index = MultiIndexHash()
+stored = [rng.getrandbits(64) for _ in range(HISTORY)]
+for i, value in enumerate(stored):
+    index.add(value, i)
+
+queries = []
+for _ in range(QUERIES):
+    value = rng.choice(stored)
+    for bit in rng.sample(range(64), rng.randint(0, DEFAULT_THRESHOLD)):
+        value ^= 1 << bit
+    queries.append(value)
+
+start = time.perf_counter()
+found = [index.search(value, DEFAULT_THRESHOLD) for value in queries]
+mih_ms = (time.perf_counter() - start) / QUERIES * 1000
+
+start = time.perf_counter()
+for value in queries[:20]:
+    [i for i, other in enumerate(stored) if hamming(value, other) <= DEFAULT_THRESHOLD]
+scan_ms = (time.perf_counter() - start) / 20 * 1000
+
+print(f"{HISTORY} stored hashes: multi-index {mih_ms:.2f} ms / lookup, linear scan {scan_ms:.1f} ms / lookup, "
+      f"found {sum(bool(f) for f in found)}/{QUERIES}")
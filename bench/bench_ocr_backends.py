@@ -0,0 +1,49 @@
+import os
+import sys
+import glob
+import shutil
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from PIL import Image
+import ocr_engine
+
+# -------------------------------------------------------------------------
+# Benchmark: per-image OCR latency, subprocess vs in-process engines
+# (pytesseract needs the tesseract binary, the others need tesserocr)
+# -------------------------------------------------------------------------
+CONFIG = '--oem 1 --psm 6'
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.png')))
+images = [Image.open(path).convert('L') for path in IMAGES]
+
+def bench(label, ocr):
+    start = time.perf_counter()
+    for image in images:
+        ocr(image)
+    elapsed = (time.perf_counter() - start) / len(images) * 1000
+    print(f"{label:28}: {elapsed:8.1f} ms / image")
+
+if shutil.which('tesseract'):
+    backend = ocr_engine.PytesseractBackend()
+    bench('pytesseract (subprocess)', lambda image: backend.image_to_string(image, CONFIG))
+
+try:
+    backend = ocr_engine.TesserocrBackend(pool_size=1)
+except ImportError:
+    print("tesserocr not installed")
+else:
+    import tesserocr
+
+    def cold(image):
+        # what a fresh engine per image costs: traineddata is loaded every time
+        with tesserocr.PyTessBaseAPI(lang='eng', oem=1, psm=6) as api:
+            api.SetImage(image)
+            return api.GetUTF8Text()
+
+    bench('tesserocr, engine per image', cold)
+    start = time.perf_counter()
+    backend.preload(CONFIG)
+    print(f"{'engine warm-up (once)':28}: {(time.perf_counter() - start) * 1000:8.1f} ms")
+    bench('tesserocr, warm pool', lambda image: backend.image_to_string(image, CONFIG))
@@ -0,0 +1,34 @@
+import os
+import sys
+import glob
+import io
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from PIL import Image
+from ocr_cache import OcrCache
+from ocr_engine import cached_ocr
+
+# -------------------------------------------------------------------------
+# Benchmark: first analysis vs re-upload of the sample prescriptions
+# (needs the tesseract binary on PATH)
+# -------------------------------------------------------------------------
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.png')))
+
+with tempfile.TemporaryDirectory() as tmp:
+    cache = OcrCache(os.path.join(tmp, 'ocr_cache.sqlite3'))
+    for label in ('first upload', 're-upload'):
+        start = time.perf_counter()
+        for path in IMAGES:
+            with open(path, 'rb') as f:
+                image_bytes = f.read()
+            cached_ocr(image_bytes, Image.open(io.BytesIO(image_bytes)), cache=cache)
+        elapsed = (time.perf_counter() - start) / len(IMAGES) * 1000
+        print(f"{label:12}: {elapsed:8.1f} ms / image")
+
+    stats = cache.stats()
+    print(f"hit rate {stats['hit_rate']:.0%} ({stats['hits']} hits, {stats['misses']} misses), "
+          f"{stats['entries']} entries, {stats['bytes'] / 1024:.1f} KB")
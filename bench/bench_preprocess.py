@@ -0,0 +1,96 @@
+import os
+import sys
+import glob
+import json
+import resource
+import subprocess
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import cv2
+import numpy as np
+
+# -------------------------------------------------------------------------
+# Benchmark: ts4's whole-image denoise + threshold vs the downscaled, tiled
+# engine on 12 MP versions of the sample photos. Each run is a fresh
+# subprocess so its peak RSS is its own; OCR matches are compared after.
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')))
+SIZE_12MP = (3024, 4032)
+
+def peak_rss_mb():
+    # ru_maxrss survives fork+exec (it would report the parent's peak), VmHWM doesn't
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_one(method, path, out_path):
+    from preprocess import _denoise_threshold, downscale_for_ocr, preprocess_photo
+
+    # raw grayscale in, so decoding the photo doesn't set the peak for both
+    image = np.load(path)
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    if method == 'ts4':
+        # ts4's original preprocess_image: whole image at full resolution
+        result = _denoise_threshold(image)
+    else:
+        result = preprocess_photo(image)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    if method == 'tiled':
+        # tiles vs one pass at the same (downscaled) resolution: must be pixel-identical
+        whole = _denoise_threshold(downscale_for_ocr(image))
+        assert (whole == result).all(), "tile seams"
+    cv2.imwrite(out_path, result)
+    print(json.dumps({'seconds': elapsed, 'extra_mb': peak - before}))
+
+def main():
+    import pandas as pd
+    import ocr_engine
+    from matching import CatalogMatcher
+    from prescription import extract_medications
+
+    matcher = CatalogMatcher(pd.read_csv(CSV_PATH)['brand_name'].drop_duplicates())
+    totals = {'ts4': [], 'tiled': []}
+    same = kept = total = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for n, path in enumerate(IMAGES):
+            big = os.path.join(tmp, f'{n}.npy')
+            np.save(big, cv2.resize(cv2.imread(path, cv2.IMREAD_GRAYSCALE), SIZE_12MP,
+                                    interpolation=cv2.INTER_CUBIC))
+            found = {}
+            for method in totals:
+                out_path = os.path.join(tmp, f'{n}_{method}.png')
+                output = subprocess.run([sys.executable, __file__, method, big, out_path],
+                                        capture_output=True, text=True, check=True).stdout
+                totals[method].append(json.loads(output.strip().splitlines()[-1]))
+                text = ocr_engine.image_to_string(cv2.imread(out_path, cv2.IMREAD_GRAYSCALE),
+                                                  '--oem 1 --psm 6')
+                found[method] = {result[0] for result in
+                                 (matcher.match_one(line, score_cutoff=60) for line in extract_medications(text))
+                                 if result}
+            same += found['ts4'] == found['tiled']
+            kept += len(found['ts4'] & found['tiled'])
+            total += len(found['ts4'])
+            print(f"{os.path.basename(path)}: ts4 {sorted(found['ts4'])} | tiled {sorted(found['tiled'])}")
+
+    for method, runs in totals.items():
+        print(f"{method:6}: {np.mean([r['seconds'] for r in runs]):6.2f} s / 12 MP image, "
+              f"peak RSS +{np.mean([r['extra_mb'] for r in runs]):4.0f} MB over the loaded photo")
+    print(f"identical catalog matches on {same}/{len(IMAGES)} images, {kept}/{total} of ts4's matches kept "
+          f"(tiles are pixel-identical to one pass at the same resolution)")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4:
+        run_one(*sys.argv[1:])
+    else:
+        main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import glob
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import cv2
+import numpy as np
+import pandas as pd
+import ocr_engine
+from matching import CatalogMatcher
+from prescription import extract_medications
+from preprocess import preprocess_photo
+from quality import check_quality, prepare_for_ocr
+
+# -------------------------------------------------------------------------
+# Benchmark: always Otsu, always denoise + adaptive (ts4), and the quality
+# gate on the sample prescriptions plus blurred / dim / shrunk / noisy /
+# shadowed / blank copies: gate cost, OCR compute, rejects, catalog matches
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.png')))
+CONFIG = '--psm 6 -l eng'
+
+def degraded(gray):
+    rng = np.random.default_rng(0)
+    height, width = gray.shape
+    return {
+        'blurred': cv2.GaussianBlur(gray, (0, 0), 5),
+        'dim': (gray * 0.15).astype(np.uint8),
+        'tiny': cv2.resize(gray, (width // 5, height // 5), interpolation=cv2.INTER_AREA),
+        'small': cv2.resize(gray, (width * 9 // 20, height * 9 // 20), interpolation=cv2.INTER_AREA),
+        'noisy': np.clip(gray + rng.normal(0, 15, gray.shape), 0, 255).astype(np.uint8),
+        'shadow': (gray * np.linspace(0.3, 1, width)[None, :]).astype(np.uint8),
+        'blank': np.full_like(gray, 200),
+    }
+
+def otsu(gray):
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+def main():
+    matcher = CatalogMatcher(pd.read_csv(CSV_PATH)['brand_name'].drop_duplicates())
+    ocr_engine.warm_up(CONFIG)
+
+    pages = {os.path.basename(path)[:21]: cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in IMAGES}
+    first = os.path.basename(IMAGES[0])[:21]
+    pages.update({f'{name} ({first[:8]})': page for name, page in degraded(pages[first]).items()})
+
+    def read(image):
+        text = ocr_engine.image_to_string(image, CONFIG)
+        return {result[0] for result in
+                (matcher.match_one(line, score_cutoff=60) for line in extract_medications(text)) if result}
+
+    def gated(gray):
+        report = check_quality(gray)
+        if not report['ok']:
+            return set()
+        return read(prepare_for_ocr(gray, report))
+
+    totals = {}
+    for label, run in (('always Otsu', lambda gray: read(otsu(gray))),
+                       ('always denoise+adaptive', lambda gray: read(preprocess_photo(gray))),
+                       ('quality gate', gated)):
+        seconds, found = 0.0, 0
+        for gray in pages.values():
+            start = time.perf_counter()
+            found += len(run(gray))
+            seconds += time.perf_counter() - start
+        totals[label] = (seconds, found)
+
+    reports = {name: check_quality(gray) for name, gray in pages.items()}
+    for name, report in reports.items():
+        verdict = 'REJECT ' + ', '.join(report['problems']) if not report['ok'] else \
+            report['variant'] + (' + ' + ', '.join(report['enhance']) if report['enhance'] else '')
+        print(f"{name:22}: {report['ms']:5.1f} ms, blur {report['blur']:6.0f}, noise {report['noise']:4.1f}, "
+              f"uneven {report['uneven']:4.0f}, ink {report['ink']:.3f}, dpi {report['dpi'] or 0:4.0f} -> {verdict}")
+    print()
+    for label, (seconds, found) in totals.items():
+        print(f"{label:24}: {seconds:6.2f} s for {len(pages)} images, {found} matched medicines")
+    print(f"gate cost {np.mean([r['ms'] for r in reports.values()]):.1f} ms / image, "
+          f"rejected {sum(not r['ok'] for r in reports.values())}/{len(pages)} before OCR")
+
+if __name__ == "__main__":
+    main()
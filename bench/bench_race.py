@@ -0,0 +1,56 @@
+import os
+import sys
+import glob
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import cv2
+import pandas as pd
+import ocr_engine
+from matching import CatalogMatcher
+from prescription import catalog_score, preprocess_image, race_ocr
+
+# -------------------------------------------------------------------------
+# Benchmark: tsrct3's single --psm 6 Otsu pass vs racing PSM 6/4/11 x
+# {Otsu, adaptive}, run to the end and with early cancellation: wall time
+# and catalog-matched lines per image
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', 'Screenshot 2026-01-18*.png')))
+CONFIG = '-l eng'
+
+def main():
+    matcher = CatalogMatcher(pd.read_csv(CSV_PATH)['brand_name'].drop_duplicates())
+    ocr_engine.warm_up(f'--psm 6 {CONFIG}')
+    pages = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in IMAGES]
+
+    def single(gray):
+        start = time.perf_counter()
+        text = ocr_engine.image_to_string(preprocess_image(gray), f'--psm 6 {CONFIG}')
+        return catalog_score(text, matcher)[0], '6/otsu', 1, time.perf_counter() - start
+
+    def race(target):
+        def run(gray):
+            result = race_ocr(gray, matcher, config=CONFIG, target=target)
+            readings = result['stats']['readings']
+            return (result['matched'], f"{result['psm']}/{result['variant']}", len(readings),
+                    max(reading['seconds'] for reading in readings))
+        return run
+
+    print(f"{len(pages)} pages, {os.cpu_count()} CPU(s), OCR backend: {ocr_engine.get_backend().name}")
+    for label, run in (('single pass (psm 6, Otsu)', single),
+                       ('race, all 6 configs', race(target=None)),
+                       ('race, stop at 6 matched', race(target=6))):
+        start = time.perf_counter()
+        results = [run(page) for page in pages]
+        elapsed = (time.perf_counter() - start) / len(pages)
+        print(f"{label:26}: {elapsed * 1000:7.0f} ms / image, {sum(r[0] for r in results):3} matched lines, "
+              f"{sum(r[2] for r in results) / len(pages):.1f} readings / image, "
+              f"slowest reading {sum(r[3] for r in results) / len(pages) * 1000:5.0f} ms; winners "
+              f"{', '.join(r[1] for r in results)}")
+    print("(with a core per config the race's wall time is about its slowest reading)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import pickle
+import tempfile
+import time
+import multiprocessing as mp
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import pandas as pd
+from catalog import Catalog, build_generic_index, shared_catalog
+
+# -------------------------------------------------------------------------
+# Benchmark: per-rerun cost of cache_data vs cache_resource, and per-process
+# memory of a parsed CSV dict vs the shared memory-mapped snapshot (Linux).
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+WORKERS = 4
+RERUNS = 20
+
+def memory_kb():
+    """(Rss, Pss) of this process; Pss splits shared pages between processes."""
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ('Rss:', 'Pss:'):
+                fields[parts[0]] = int(parts[1])
+    return fields['Rss:'], fields['Pss:']
+
+def load_dict():
+    df = pd.read_csv(CSV_PATH)
+    df_clean = df.drop_duplicates(subset=['brand_name'], keep='first')
+    return df, df_clean.set_index('brand_name').to_dict('index'), build_generic_index(df)
+
+def worker(mode, snapshot, ready, done):
+    rss_before, pss_before = memory_kb()
+    if mode == 'csv':
+        _, medicines, _ = load_dict()
+    else:
+        medicines = shared_catalog(snapshot)
+        # touch every row, like a worker that has served many requests
+        for row in range(len(medicines)):
+            medicines.price[row], medicines.generic_id[row]
+        bytes(medicines.names.blob)
+    rss_after, pss_after = memory_kb()
+    ready.put((rss_after - rss_before, pss_after - pss_before))
+    done.wait()
+
+def measure_workers(mode, snapshot):
+    ctx = mp.get_context('spawn')
+    ready, done = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=worker, args=(mode, snapshot, ready, done)) for _ in range(WORKERS)]
+    for proc in procs:
+        proc.start()
+    # read while all workers are alive so Pss reflects the sharing
+    results = [ready.get() for _ in procs]
+    done.set()
+    for proc in procs:
+        proc.join()
+    return results
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, 'formatted_medicines_v3.snapshot')
+        Catalog.from_frame(pd.read_csv(CSV_PATH)).save(snapshot)
+
+        # cache_data: every rerun unpickles a copy; cache_resource: same object back
+        for label, value in (('CSV df + dict', load_dict()), ('snapshot Catalog', Catalog.load(snapshot))):
+            payload = pickle.dumps(value)
+            start = time.perf_counter()
+            for _ in range(RERUNS):
+                pickle.loads(payload)
+            copy_ms = (time.perf_counter() - start) / RERUNS * 1000
+            print(f"{label:17} cache_data rerun: {copy_ms:7.2f} ms ({len(payload) / 1e6:.1f} MB copied), "
+                  f"cache_resource rerun: ~0 ms (shared reference)")
+
+        for mode in ('csv', 'snapshot'):
+            results = measure_workers(mode, snapshot)
+            rss = sum(r[0] for r in results) / len(results) / 1024
+            pss = sum(r[1] for r in results) / len(results) / 1024
+            print(f"{mode:9} x{WORKERS} workers: +{rss:6.1f} MB RSS / worker, +{pss:6.1f} MB PSS / worker")
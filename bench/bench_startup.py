@@ -0,0 +1,60 @@
+import os
+import sys
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# -------------------------------------------------------------------------
+# Benchmark: time-to-first-lookup, CSV path vs memory-mapped snapshot.
+# Each run is a fresh interpreter, like a new process or a cache miss.
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+RUNS = 5
+
+CSV_STARTUP = """
+import time
+import pandas as pd
+from catalog import build_generic_index, cheapest_alternative
+start = time.perf_counter()
+df = pd.read_csv(CSV_PATH)
+df_clean = df.drop_duplicates(subset=['brand_name'], keep='first')
+medicines = df_clean.set_index('brand_name').to_dict('index')
+generic_index = build_generic_index(df)
+data = medicines['Tivizid 300 mg+150 mg+300 mg']
+cheapest_alternative(data['generic_name'], generic_index)
+print(time.perf_counter() - start)
+"""
+
+SNAPSHOT_STARTUP = """
+import time
+from catalog import cheapest_alternative, load_catalog
+start = time.perf_counter()
+_, catalog, _ = load_catalog(SNAPSHOT_PATH, CSV_PATH)
+data = catalog['Tivizid 300 mg+150 mg+300 mg']
+cheapest_alternative(data['generic_name'], catalog.generic_index)
+print(time.perf_counter() - start)
+"""
+
+def time_startup(code, **paths):
+    header = ''.join(f"{key} = {value!r}\n" for key, value in paths.items())
+    runs = []
+    for _ in range(RUNS):
+        out = subprocess.run([sys.executable, '-c', header + code], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(float(out))
+    return min(runs) * 1000
+
+import pandas as pd
+from catalog import Catalog
+
+with tempfile.TemporaryDirectory() as tmp:
+    snapshot = os.path.join(tmp, 'formatted_medicines_v3.snapshot')
+    Catalog.from_frame(pd.read_csv(CSV_PATH)).save(snapshot, CSV_PATH)
+
+    csv_ms = time_startup(CSV_STARTUP, CSV_PATH=CSV_PATH)
+    snapshot_ms = time_startup(SNAPSHOT_STARTUP, SNAPSHOT_PATH=snapshot, CSV_PATH=CSV_PATH)
+
+print(f"CSV path:      {csv_ms:.0f} ms to first lookup (after imports)")
+print(f"Snapshot path: {snapshot_ms:.0f} ms to first lookup (after imports)")
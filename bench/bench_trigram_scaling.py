@@ -0,0 +1,52 @@
+import os
+import sys
+import random
+import time
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from matching import CatalogMatcher
+
+# -------------------------------------------------------------------------
+# Benchmark: match_one latency as the catalog grows from 22k to 1M names
+# Usage: python bench/bench_trigram_scaling.py [size size ...]
+# -------------------------------------------------------------------------
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+SIZES = [int(arg) for arg in sys.argv[1:]] or [22_000, 100_000, 300_000, 1_000_000]
+QUERIES = 100
+
+def synthetic_brand(name, rng):
+    """New catalog entry: brand with a few letters swapped, strength kept."""
+    brand, _, strength = name.partition(' ')
+    chars = list(brand)
+    for _ in range(rng.randint(1, 3)):
+        chars[rng.randrange(len(chars))] = rng.choice('abcdefghiklmnoprstuvxz')
+    return f"{''.join(chars)} {strength}".strip()
+
+df = pd.read_csv(CSV_PATH)
+base_names = df['brand_name'].dropna().drop_duplicates().tolist()
+
+rng = random.Random(7)
+all_names = list(base_names)
+while len(all_names) < max(SIZES):
+    all_names.append(synthetic_brand(rng.choice(base_names), rng))
+
+queries = []
+for _ in range(QUERIES):
+    chars = list(rng.choice(base_names).lower())
+    chars[rng.randrange(len(chars))] = rng.choice('aeiou')
+    queries.append(''.join(chars))
+
+print(f"{'names':>10} {'build s':>8} {'match_one ms':>13}")
+for size in SIZES:
+    start = time.perf_counter()
+    matcher = CatalogMatcher(all_names[:size])
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for query in queries:
+        matcher.match_one(query)
+    query_ms = (time.perf_counter() - start) / QUERIES * 1000
+
+    print(f"{size:>10} {build_s:>8.1f} {query_ms:>13.2f}")
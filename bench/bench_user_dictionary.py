@@ -0,0 +1,88 @@
+import os
+import sys
+import glob
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import cv2
+import pandas as pd
+import ocr_engine
+from catalog import DOSAGE_FORM_WORDS, build_strength_index, user_patterns, user_words
+from layout import layout_ocr
+from matching import CatalogMatcher, normalize
+from prescription import extract_medications, preprocess_image
+
+# -------------------------------------------------------------------------
+# Benchmark: OCR with and without the catalog user-words / user-patterns
+# from medicine.csv, on the sample prescriptions: medication lines the
+# brand/strength fast path answers, and how many WRatio comparisons the
+# fuzzy fallback still has to run for the rest. LSTM configs, so the
+# patterns file is written but never passed (legacy --oem 0 only)
+# -------------------------------------------------------------------------
+MEDICINE_CSV = os.path.join(ROOT, 'csv files', 'medicine.csv')
+CSV_PATH = os.path.join(ROOT, 'csv files', 'formatted_medicines_v3.csv')
+IMAGES = sorted(glob.glob(os.path.join(ROOT, 'exmpl prscrptn', '*.jpg')) +
+                glob.glob(os.path.join(ROOT, 'exmpl prscrptn', 'Screenshot 2026-01-18*.png')))
+READERS = {
+    'page, psm 6': lambda gray: ocr_engine.image_to_string(preprocess_image(gray), '--psm 6 -l eng'),
+    'rx body lines, psm 7': lambda gray: layout_ocr(gray)['text'],
+}
+
+def write_dictionary(folder):
+    """The ETL's step 8 (CSV_scrap_chpstBRND.py) into folder."""
+    df = pd.read_csv(MEDICINE_CSV)
+    start = time.perf_counter()
+    words = user_words(pd.concat([df['brand name'], df['generic'], df['strength'], pd.Series(DOSAGE_FORM_WORDS)]))
+    patterns = user_patterns(df['strength'])
+    words_path, patterns_path = os.path.join(folder, 'medicine.user-words'), os.path.join(folder, 'medicine.user-patterns')
+    with open(words_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(words) + '\n')
+    with open(patterns_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(patterns) + '\n')
+    print(f"dictionary: {len(words)} words, {len(patterns)} patterns in {time.perf_counter() - start:.2f} s")
+    return words_path, patterns_path
+
+def match_lines(matcher, lines):
+    """(matched names, fast path hits, WRatio comparisons in the fuzzy fallback)."""
+    matched, fast, compared = set(), 0, 0
+    for line in lines:
+        result = matcher.fast_match(line, score_cutoff=60)
+        if result is not None:
+            fast += 1
+        else:
+            query = normalize(line)
+            compared += len(matcher.index.candidates(query, limit=300) or matcher._ratio_candidates(query, 300))
+            result = matcher.match_one(line, score_cutoff=60)
+        if result:
+            matched.add(result[0])
+    return matched, fast, compared
+
+def main():
+    df = pd.read_csv(CSV_PATH)
+    matcher = CatalogMatcher(df['brand_name'].drop_duplicates(), build_strength_index(df))
+    pages = [cv2.imread(path, cv2.IMREAD_GRAYSCALE) for path in IMAGES]
+    print(f"{len(pages)} pages, OCR backend: {ocr_engine.get_backend().name}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        words_path, patterns_path = write_dictionary(folder)
+        for reader, read in READERS.items():
+            for label, paths in (('no dictionary', ()), ('user-words', (words_path, patterns_path))):
+                ocr_engine.use_user_dictionary(*paths)
+                start = time.perf_counter()
+                texts = [read(page) for page in pages]
+                elapsed = (time.perf_counter() - start) / len(pages)
+                lines = [line for text in texts for line in extract_medications(text)]
+                start = time.perf_counter()
+                matched = [match_lines(matcher, extract_medications(text)) for text in texts]
+                match_ms = (time.perf_counter() - start) * 1000
+                fast = sum(m[1] for m in matched)
+                print(f"{reader:20} {label:22}: OCR {elapsed * 1000:5.0f} ms / image, {len(lines):3} medication lines, "
+                      f"fast path {fast:3} ({fast / max(len(lines), 1):4.0%}), "
+                      f"{sum(m[2] for m in matched):6} WRatio comparisons, "
+                      f"{sum(len(m[0]) for m in matched):3} matched medicines, matching {match_ms:5.0f} ms")
+    ocr_engine.use_user_dictionary()
+
+if __name__ == "__main__":
+    main()
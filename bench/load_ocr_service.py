@@ -0,0 +1,99 @@
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# -------------------------------------------------------------------------
+# Load generator for the OCR job API in tsrct/tsrct2.py (start it first)
+# -------------------------------------------------------------------------
+
+def post_image(url, path):
+    """multipart/form-data POST of one image, returns (status, json body, headers)."""
+    boundary = uuid.uuid4().hex
+    with open(path, 'rb') as f:
+        image_bytes = f.read()
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+            f'filename="{os.path.basename(path)}"\r\nContent-Type: application/octet-stream\r\n\r\n'
+            ).encode() + image_bytes + f'\r\n--{boundary}--\r\n'.encode()
+    req = urllib.request.Request(url, data=body, method='POST',
+                                 headers={'Content-Type': f'multipart/form-data; boundary={boundary}'})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, json.loads(response.read()), response.headers
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}'), e.headers
+
+def get_json(url):
+    with urllib.request.urlopen(url) as response:
+        return json.loads(response.read())
+
+def run_upload(base_url, path, poll_interval):
+    start = time.perf_counter()
+    status, body, _ = post_image(f"{base_url}/jobs", path)
+    if status == 503:
+        return 'rejected', time.perf_counter() - start
+    if status != 202:
+        return 'error', time.perf_counter() - start
+
+    while True:
+        job = get_json(f"{base_url}/jobs/{body['job_id']}")
+        if job['status'] in ('done', 'failed'):
+            return job['status'], time.perf_counter() - start
+        time.sleep(poll_interval)
+
+def probe(base_url, stop, latencies):
+    """Times a cheap request while uploads are in flight (head-of-line check)."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        urllib.request.urlopen(f"{base_url}/").read()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.2)
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))] if values else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent uploads against the OCR job API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8001")
+    parser.add_argument("--images", default=os.path.join(ROOT, 'tsrct'))
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--poll", type=float, default=0.25, help="seconds between status polls")
+    args = parser.parse_args()
+
+    images = sorted(glob.glob(os.path.join(args.images, '*.png')) +
+                    glob.glob(os.path.join(args.images, '*.jpg')))
+    uploads = [images[i % len(images)] for i in range(args.requests)]
+
+    stop = threading.Event()
+    probe_latencies = []
+    prober = threading.Thread(target=probe, args=(args.url, stop, probe_latencies), daemon=True)
+    prober.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(lambda path: run_upload(args.url, path, args.poll), uploads))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+
+    done = [seconds for outcome, seconds in results if outcome == 'done']
+    counts = {outcome: sum(1 for o, _ in results if o == outcome)
+              for outcome in ('done', 'failed', 'rejected', 'error')}
+    print(f"{args.requests} uploads, {args.concurrency} concurrent, {elapsed:.1f}s: {counts}")
+    print(f"throughput: {len(done) / elapsed:.2f} jobs/s")
+    print(f"job latency: p50 {percentile(done, 50):.2f}s  p95 {percentile(done, 95):.2f}s")
+    print(f"GET / while loaded: p50 {percentile(probe_latencies, 50) * 1000:.0f}ms  "
+          f"max {max(probe_latencies, default=0) * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from rapidfuzz import fuzz, process
+
+from matching import normalize, trigrams
+
+# -------------------------------------------------------------------------
+# Bulk matcher for nightly reconciliation (invoice lines -> catalog)
+# -------------------------------------------------------------------------
+
+class TfidfMatcher:
+    """
+    Catalog names as a sparse TF-IDF matrix over character trigrams.
+    A batch of lines is matched with one sparse product per chunk, the
+    top_k rows by cosine get WRatio, so scores mean the same as in the apps.
+    """
+
+    def __init__(self, names):
+        self.names = [name for name in names if name is not None and name == name]
+        self.processed = [normalize(name) for name in self.names]
+        self.vocab = {}
+        counts = self._vectorize(self.processed, grow=True)
+
+        # smoothed idf, same formula sklearn's TfidfVectorizer uses
+        doc_freq = np.bincount(counts.indices, minlength=len(self.vocab))
+        self.idf = (np.log((1 + len(self.names)) / (1 + doc_freq)) + 1).astype(np.float32)
+        self.matrix = self._weigh(counts).T.tocsr()
+
+    def _vectorize(self, texts, grow=False):
+        """Binary gram-count CSR matrix; unknown grams are dropped unless grow."""
+        indptr, indices = [0], []
+        for text in texts:
+            for gram in trigrams(text):
+                col = self.vocab.get(gram)
+                if col is None:
+                    if not grow:
+                        continue
+                    col = self.vocab[gram] = len(self.vocab)
+                indices.append(col)
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.float32)
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(texts), len(self.vocab)))
+
+    def _weigh(self, counts):
+        """tf * idf, then L2-normalize each row so a dot product is the cosine."""
+        weighted = counts.multiply(self.idf).tocsr()
+        norms = np.sqrt(weighted.multiply(weighted).sum(axis=1)).A1
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms).dot(weighted).tocsr()
+
+    def match(self, lines, score_cutoff=60, top_k=10, chunk_size=256):
+        """
+        Yields (best_match, score) or None per line, in input order.
+        chunk_size bounds the chunk x catalog similarity block held at once.
+        """
+        for start in range(0, len(lines), chunk_size):
+            chunk = [normalize(line) for line in lines[start:start + chunk_size]]
+            similarity = (self._weigh(self._vectorize(chunk)) @ self.matrix).toarray()
+
+            k = min(top_k, similarity.shape[1] - 1)
+            top = np.argpartition(-similarity, k, axis=1)[:, :top_k]
+            for query, row, cols in zip(chunk, similarity, top):
+                cols = sorted(col for col in cols if row[col] > 0)
+                if not query or not cols:
+                    yield None
+                    continue
+                result = process.extractOne(query, [self.processed[col] for col in cols],
+                                            scorer=fuzz.WRatio)
+                score = int(round(result[1]))
+                yield (self.names[cols[result[2]]], score) if score >= score_cutoff else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Match free-text invoice lines against the catalog.")
+    parser.add_argument("lines", help="CSV with the lines to match (or a plain .txt, one per line)")
+    parser.add_argument("--column", default="line", help="CSV column holding the text")
+    parser.add_argument("--catalog", default=r'F:\pybls\csv files\formatted_medicines_v3.csv')
+    parser.add_argument("--out", default="matched_lines.csv")
+    parser.add_argument("--cutoff", type=int, default=60)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args()
+
+    catalog = pd.read_csv(args.catalog)
+    start = time.perf_counter()
+    matcher = TfidfMatcher(catalog['brand_name'].drop_duplicates())
+    print(f"Catalog vectorized: {len(matcher.names)} names, {len(matcher.vocab)} grams "
+          f"in {time.perf_counter() - start:.1f}s")
+
+    if args.lines.endswith('.txt'):
+        with open(args.lines, encoding='utf-8') as f:
+            lines = [line.strip() for line in f if line.strip()]
+    else:
+        lines = pd.read_csv(args.lines)[args.column].astype(str).tolist()
+
+    start = time.perf_counter()
+    rows = []
+    for line, match_result in zip(lines, matcher.match(lines, args.cutoff, chunk_size=args.chunk_size)):
+        best_match, score = match_result if match_result else (None, None)
+        rows.append({'line': line, 'best_match': best_match, 'score': score})
+    elapsed = time.perf_counter() - start
+
+    pd.DataFrame(rows).to_csv(args.out, index=False)
+    matched = sum(row['best_match'] is not None for row in rows)
+    print(f"Matched {matched}/{len(lines)} lines in {elapsed:.1f}s "
+          f"({len(lines) / elapsed:.0f} lines/s) -> {args.out}")
+
+if __name__ == "__main__":
+    main()
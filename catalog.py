@@ -0,0 +1,456 @@
+import os
+import re
+import bisect
+import shutil
+import sys
+import tempfile
+import numpy as np
+import pandas as pd
+
+# -------------------------------------------------------------------------
+# Shared catalog helpers for the app versions
+# -------------------------------------------------------------------------
+
+def build_generic_index(df):
+    """
+    Builds {generic_name: [(brand_name, price), ...]} once, cheapest first.
+    The sort is stable so ties keep CSV order, same pick as idxmin().
+    """
+    ranked = df.sort_values('price', kind='mergesort')
+    index = {}
+    for brand, price, generic in zip(ranked['brand_name'], ranked['price'], ranked['generic_name']):
+        if pd.isna(generic):
+            continue
+        index.setdefault(generic, []).append((brand, float(price)))
+    return index
+
+def cheapest_alternative(generic, generic_index=None, df=None, exclude=None):
+    """
+    Returns (brand_name, price) of the cheapest brand for a generic, or None.
+    Uses the precomputed index when given, otherwise scans df like before.
+    """
+    if generic_index is not None:
+        for brand, price in generic_index.get(generic, []):
+            if brand != exclude:
+                return brand, price
+        return None
+
+    if df is None:
+        return None
+    alternatives = df[df['generic_name'] == generic]
+    if exclude is not None:
+        alternatives = alternatives[alternatives['brand_name'] != exclude]
+    if alternatives.empty:
+        return None
+    cheapest_row = alternatives.loc[alternatives['price'].idxmin()]
+    return cheapest_row['brand_name'], cheapest_row['price']
+
+# -------------------------------------------------------------------------
+# Structured strengths: "(10 mg+30 mg+1.25 mg)/5 ml" -> values, units, per
+# -------------------------------------------------------------------------
+_PER_VOLUME = re.compile(
+    r'/\s*((?:\d+(?:\.\d+)?\s*)?(?:ml|gm|g|mg|l|vial|puff|spray|sachet|ampoule|'
+    r'prefilled syringe|tablet|capsule|drop|dose|actuation|container|bottle|tube)s?)\s*$', re.IGNORECASE)
+_STRENGTH_PART = re.compile(r'(\d+(?:\.\d+)?)\s*(%|[a-zA-Z]+)?')
+_NUMBER = re.compile(r'\d+(?:\.\d+)?')
+_BRAND_STRENGTH = re.compile(r'^(.*?)\s+(\(?\d.*)$')
+
+def parse_strength(text):
+    """
+    Splits a strength string into (values, units, per_volume).
+    "4 mg/5 ml" -> ([4.0], ['mg'], '5 ml'); "500 mg+400 IU" -> ([500.0, 400.0], ['mg', 'IU'], None)
+    """
+    if pd.isna(text):
+        return [], [], None
+    text = str(text).strip()
+
+    per_volume = None
+    match = _PER_VOLUME.search(text)
+    if match:
+        per_volume = match.group(1).strip()
+        text = text[:match.start()]
+
+    values, units = [], []
+    for number, unit in _STRENGTH_PART.findall(text):
+        values.append(float(number))
+        units.append(unit or '')
+    return values, units, per_volume
+
+def format_values(values):
+    """[300.0, 150.0] -> '300+150', the CSV form of strength_values."""
+    return '+'.join(f"{value:g}" for value in values)
+
+def query_numbers(text):
+    """Numbers typed in a query, e.g. 'tivizid 300' -> [300.0]."""
+    return [float(number) for number in _NUMBER.findall(str(text))]
+
+def split_brand_strength(name):
+    """'Tivizid 300 mg+150 mg' -> ('Tivizid', '300 mg+150 mg'); no strength -> (name, None)."""
+    match = _BRAND_STRENGTH.match(str(name))
+    if match and match.group(1):
+        return match.group(1), match.group(2)
+    return str(name), None
+
+def build_strength_index(df):
+    """
+    Builds {brand: [(strength values, brand_name), ...]} in catalog order.
+    Uses the ETL's brand/strength_values columns when the CSV has them,
+    otherwise splits brand_name at the first number. Also takes a plain
+    list of names (e.g. a snapshot Catalog's keys).
+    """
+    if not hasattr(df, 'columns'):
+        df = pd.DataFrame({'brand_name': list(df)})
+
+    index = {}
+    has_columns = 'brand' in df.columns and 'strength_values' in df.columns
+    for row in df.itertuples(index=False):
+        name = row.brand_name
+        if pd.isna(name):
+            continue
+        if has_columns and not pd.isna(row.brand):
+            brand = row.brand
+            values = [] if pd.isna(row.strength_values) else query_numbers(row.strength_values)
+        else:
+            brand, strength = split_brand_strength(name)
+            values = parse_strength(strength)[0]
+        index.setdefault(brand, []).append((tuple(values), name))
+    return index
+
+def pick_strength(entries, numbers):
+    """
+    Picks the brand_name whose strength values cover the typed numbers.
+    No numbers -> first entry; numbers that match no strength -> None.
+    """
+    if not numbers:
+        return entries[0][1]
+
+    best_name, best_hits = None, 0
+    for values, name in entries:
+        remaining = list(values)
+        hits = 0
+        for number in numbers:
+            if number in remaining:
+                remaining.remove(number)
+                hits += 1
+        if hits > best_hits:
+            best_name, best_hits = name, hits
+    return best_name
+
+# -------------------------------------------------------------------------
+# Tesseract user dictionary: catalog words and strength formats, so OCR
+# prefers "Cefixime 400mg" over "Cefixirne 4OOmg"
+# -------------------------------------------------------------------------
+DOSAGE_FORM_WORDS = ['Tab', 'Tablet', 'Cap', 'Capsule', 'Syp', 'Syrup', 'Inj', 'Injection', 'Susp',
+                     'Suspension', 'Drop', 'Drops', 'Cream', 'Oint', 'Ointment', 'Gel', 'Supp']
+_DICT_WORD = re.compile(r"[A-Za-z][A-Za-z'.\-]*[A-Za-z.]")
+
+def user_words(texts):
+    """
+    Words for Tesseract's --user-words file: every alphabetic token of the
+    given names/strengths, as written, lower, upper and capitalized
+    (prescriptions write "NAPA", "napa" and "Napa").
+    """
+    words = set()
+    for text in texts:
+        if pd.isna(text):
+            continue
+        for token in str(text).split():
+            token = token.strip('()[],;:+/')
+            if _DICT_WORD.fullmatch(token):
+                words.update((token, token.lower(), token.upper(), token.capitalize()))
+    return sorted(words)
+
+def user_patterns(strengths):
+    r"""
+    Tesseract --user-patterns for the catalog's strength formats: each
+    token with a number, spaced ("500", "mg/5") or run together
+    ("500mg/5ml"), with integers as \d\d\* and decimals as \d\d\*.\d\d\*.
+    """
+    def shape(token):
+        return _NUMBER.sub(lambda m: r'\d\d\*.\d\d\*' if '.' in m.group() else r'\d\d\*', token)
+
+    patterns = set()
+    for text in strengths:
+        if pd.isna(text):
+            continue
+        text = str(text).replace('\\', '')
+        for token in text.split() + [text.replace(' ', '')]:
+            token = token.strip('()[],;:+')
+            # Tesseract aborts on pattern characters outside its unicharset (µ)
+            if _NUMBER.search(token) and token.isascii():
+                patterns.add(shape(token))
+    return sorted(patterns)
+
+# -------------------------------------------------------------------------
+# Binary snapshot: the lookup structures as .npy files, memory-mapped on load
+# -------------------------------------------------------------------------
+
+class StringColumn:
+    """
+    Strings stored as one UTF-8 blob plus offsets, both plain arrays, so the
+    column can be memory-mapped and a single value decoded on demand.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        encoded = [text.encode('utf-8') for text in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(data) for data in encoded])
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode('utf-8')
+
+    def __iter__(self):
+        data = bytes(self.blob)
+        offsets = self.offsets.tolist()
+        for start, end in zip(offsets, offsets[1:]):
+            yield data[start:end].decode('utf-8')
+
+class GenericRanking:
+    """
+    Array form of build_generic_index(): rows grouped by generic, cheapest
+    first. .get() yields (brand_name, price) pairs lazily, cheapest first,
+    so cheapest_alternative() only decodes the names it looks at.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+
+    def get(self, generic, default=None):
+        catalog = self.catalog
+        gid = catalog.generic_ids.get(generic)
+        if gid is None:
+            return default if default is not None else iter(())
+        start, end = catalog.generic_offsets[gid], catalog.generic_offsets[gid + 1]
+        return ((catalog.names[row], round(float(catalog.price[row]), 2)) for row in catalog.ranked_rows[start:end])
+
+    def __contains__(self, generic):
+        return generic in self.catalog.generic_ids
+
+class Medicine:
+    """One catalog row; data['price'] works like on the old per-row dicts."""
+
+    __slots__ = ('price', 'generic_name', 'cheapest_brand_ref')
+
+    def __init__(self, price, generic_name, cheapest_brand_ref):
+        self.price = price
+        self.generic_name = generic_name
+        self.cheapest_brand_ref = cheapest_brand_ref
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        return (f"Medicine(price={self.price!r}, generic_name={self.generic_name!r}, "
+                f"cheapest_brand_ref={self.cheapest_brand_ref!r})")
+
+class Catalog:
+    """
+    Read-only, array-backed stand-in for the medicines dict. Rows are sorted
+    by brand_name so catalog[name] is a binary search, and it supports the
+    catalog[name]['price'] / ['generic_name'] access the apps use. keys()
+    and iteration follow CSV order like the dict did, so matchers built on
+    them break score ties the same way.
+    Compact: names/refs as UTF-8 blobs, float32 prices, int32 generic ids
+    into ~1.6k interned generic names, Medicine records with __slots__.
+    """
+
+    ARRAYS = ['names_blob', 'names_offsets', 'price', 'generic_id', 'generics_blob',
+              'generics_offsets', 'refs_blob', 'refs_offsets', 'ranked_rows', 'generic_offsets', 'csv_order']
+
+    def __init__(self, arrays):
+        self.names = StringColumn(arrays['names_blob'], arrays['names_offsets'])
+        self.generics = StringColumn(arrays['generics_blob'], arrays['generics_offsets'])
+        self.refs = StringColumn(arrays['refs_blob'], arrays['refs_offsets'])
+        self.price = arrays['price']
+        self.generic_id = arrays['generic_id']
+        self.ranked_rows = arrays['ranked_rows']
+        self.generic_offsets = arrays['generic_offsets']
+        # sorted rows in CSV order (first occurrence of each brand_name)
+        self.csv_order = arrays['csv_order']
+        # ~1.6k generics: decode once, intern, and share between all records
+        self.generic_names = [sys.intern(generic) for generic in self.generics]
+        self.generic_ids = {generic: gid for gid, generic in enumerate(self.generic_names)}
+        self.generic_index = GenericRanking(self)
+        self._keys = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """Builds the arrays from a formatted_medicines_v3-style frame."""
+        csv_row = np.arange(len(df))
+        df = df.assign(csv_row=csv_row).dropna(subset=['brand_name'])
+        df = df.drop_duplicates(subset=['brand_name'], keep='first')
+        df = df.sort_values('brand_name', kind='mergesort').reset_index(drop=True)
+
+        generics = sorted(df['generic_name'].dropna().unique())
+        generic_ids = {generic: gid for gid, generic in enumerate(generics)}
+        generic_id = np.array([generic_ids.get(g, -1) for g in df['generic_name']], dtype=np.int32)
+
+        # generic -> rows cheapest first; stable on CSV order like idxmin()
+        price = df['price'].to_numpy(dtype=np.float32)
+        ranked = np.lexsort((df['csv_row'].to_numpy(), price, generic_id))
+        ranked = ranked[generic_id[ranked] >= 0]
+        generic_offsets = np.searchsorted(generic_id[ranked], np.arange(len(generics) + 1))
+
+        names = StringColumn.from_strings(df['brand_name'])
+        generic_col = StringColumn.from_strings(generics)
+        refs = StringColumn.from_strings(df['cheapest_brand_ref'].fillna('')
+                                         if 'cheapest_brand_ref' in df.columns else [''] * len(df))
+        return cls({
+            'names_blob': names.blob, 'names_offsets': names.offsets,
+            'price': price, 'generic_id': generic_id,
+            'generics_blob': generic_col.blob, 'generics_offsets': generic_col.offsets,
+            'refs_blob': refs.blob, 'refs_offsets': refs.offsets,
+            'ranked_rows': ranked.astype(np.int32), 'generic_offsets': generic_offsets.astype(np.int64),
+            'csv_order': np.argsort(df['csv_row'].to_numpy(), kind='stable').astype(np.int32),
+        })
+
+    def save(self, directory, csv_path=None):
+        """
+        Writes one .npy per array into `directory`, plus the size and mtime
+        of csv_path (source.npy) so loaders can tell when the CSV changed.
+        """
+        os.makedirs(directory, exist_ok=True)
+        arrays = {
+            'names_blob': self.names.blob, 'names_offsets': self.names.offsets,
+            'price': self.price, 'generic_id': self.generic_id,
+            'generics_blob': self.generics.blob, 'generics_offsets': self.generics.offsets,
+            'refs_blob': self.refs.blob, 'refs_offsets': self.refs.offsets,
+            'ranked_rows': self.ranked_rows, 'generic_offsets': self.generic_offsets,
+            'csv_order': self.csv_order,
+        }
+        for key, array in arrays.items():
+            np.save(os.path.join(directory, f"{key}.npy"), np.ascontiguousarray(array))
+        if csv_path is not None:
+            np.save(os.path.join(directory, 'source.npy'), np.array(csv_signature(csv_path), dtype=np.int64))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Opens a saved snapshot; with mmap nothing is read until it is used."""
+        mode = 'r' if mmap else None
+        return cls({key: np.load(os.path.join(directory, f"{key}.npy"), mmap_mode=mode)
+                    for key in cls.ARRAYS})
+
+    @staticmethod
+    def _find(column, key):
+        i = bisect.bisect_left(column, key)
+        if i < len(column) and column[i] == key:
+            return i
+        return None
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return self._find(self.names, name) is not None
+
+    def __getitem__(self, name):
+        row = self._find(self.names, name)
+        if row is None:
+            raise KeyError(name)
+        gid = self.generic_id[row]
+        # prices are taka with 2 decimals; rounding undoes the float32 storage
+        return Medicine(round(float(self.price[row]), 2),
+                        self.generic_names[gid] if gid >= 0 else None,
+                        self.refs[row] or None)
+
+    def keys(self):
+        # decoded once, in CSV order: fuzzy matchers want a real list of names
+        if self._keys is None:
+            names = list(self.names)
+            self._keys = [names[row] for row in self.csv_order.tolist()]
+        return self._keys
+
+    def __iter__(self):
+        return iter(self.keys())
+
+# one read-only Catalog per process, see shared_catalog()
+_SHARED = {}
+
+def csv_signature(csv_path):
+    """[size, mtime_ns] of the CSV a snapshot was built from."""
+    stat = os.stat(csv_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def snapshot_is_current(snapshot_path, csv_path=None):
+    """
+    True if snapshot_path has every array and was saved from csv_path as it
+    is now. Snapshots without source.npy (older ETL runs) are stale; with no
+    CSV to compare against, any complete snapshot will do.
+    """
+    if not all(os.path.isfile(os.path.join(snapshot_path, f"{key}.npy")) for key in Catalog.ARRAYS):
+        return False
+    if csv_path is None or not os.path.isfile(csv_path):
+        return True
+    source = os.path.join(snapshot_path, 'source.npy')
+    return os.path.isfile(source) and np.load(source).tolist() == csv_signature(csv_path)
+
+def load_catalog(snapshot_path, csv_path):
+    """
+    (df, catalog, catalog.generic_index) for the apps: the memory-mapped
+    snapshot (df None) when it matches csv_path, else parsed from the CSV.
+    (None, None, None) when neither is there. Rerun CSV_scrap_chpstBRND.py
+    to bring a stale snapshot back.
+    """
+    if snapshot_is_current(snapshot_path, csv_path):
+        catalog = Catalog.load(snapshot_path)
+        return None, catalog, catalog.generic_index
+    try:
+        df = pd.read_csv(csv_path)
+    except FileNotFoundError:
+        return None, None, None
+    # compact array-backed catalog instead of one dict per row; its
+    # generic_index ranks brands by price, so the cheapest is a direct hit
+    catalog = Catalog.from_frame(df)
+    return df, catalog, catalog.generic_index
+
+def shared_catalog(snapshot_path, csv_path=None):
+    """
+    Returns this process's Catalog for snapshot_path, loading it on first use.
+    The arrays are memory-mapped, so every worker process maps the same
+    pages from the OS page cache instead of holding its own copy. If the
+    snapshot is missing, or stale against csv_path, it is rebuilt from the
+    CSV first (written to a temp dir and renamed, so concurrent workers
+    never see half a snapshot). If the old one can't be swapped out (still
+    mapped on Windows), this process uses the rebuilt catalog unshared.
+    Callers must treat the result as read-only.
+    """
+    if snapshot_path in _SHARED:
+        return _SHARED[snapshot_path]
+
+    if not snapshot_is_current(snapshot_path, csv_path):
+        if csv_path is None or not os.path.isfile(csv_path):
+            raise FileNotFoundError(csv_path or snapshot_path)
+        parent = os.path.dirname(os.path.abspath(snapshot_path))
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix='.snapshot-')
+        built = Catalog.from_frame(pd.read_csv(csv_path))
+        built.save(tmp_dir, csv_path)
+        try:
+            if os.path.isdir(snapshot_path):
+                os.rename(snapshot_path, tmp_dir + '-stale')
+                shutil.rmtree(tmp_dir + '-stale', ignore_errors=True)
+            os.rename(tmp_dir, snapshot_path)
+        except OSError:
+            # another worker got there first, or the old one is in use
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not snapshot_is_current(snapshot_path, csv_path):
+            _SHARED[snapshot_path] = built
+            return built
+
+    catalog = _SHARED[snapshot_path] = Catalog.load(snapshot_path)
+    return catalog
@@ -1,6 +1,11 @@
+import os
+import sys
 import pandas as pd
 import re
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import parse_strength, format_values
+
 df = pd.read_csv(r'F:\pybls\csv files\medicine.csv')
 
 def extract_price(text):
@@ -13,10 +18,17 @@ brands = pd.DataFrame()
 brands['brand_name'] = df['brand name'].astype(str) + " " + df['strength'].astype(str)
 brands['price'] = df['clean_price']
 brands['generic_name'] = df['generic']
+parsed = df['strength'].apply(parse_strength)
+brands['brand'] = df['brand name']
+brands['strength'] = df['strength']
+brands['strength_values'] = parsed.apply(lambda p: format_values(p[0]))
+brands['strength_units'] = parsed.apply(lambda p: '+'.join(p[1]))
+brands['per_volume'] = parsed.apply(lambda p: p[2])
 
 generics = df.groupby('generic')['clean_price'].min().reset_index()
 generics.columns = ['brand_name', 'price']
 generics['generic_name'] = generics['brand_name']
+generics['brand'] = generics['brand_name']
 
 final_df = pd.concat([brands, generics], ignore_index=True)
 
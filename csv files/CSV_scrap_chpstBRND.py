@@ -1,6 +1,11 @@
+import os
+import sys
 import pandas as pd
 import re
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import Catalog, DOSAGE_FORM_WORDS, format_values, parse_strength, user_patterns, user_words
+
 # 1. Load the data
 df = pd.read_csv(r'F:\pybls\csv files\medicine.csv')
 
@@ -19,6 +24,15 @@ brands['price'] = df['clean_price']
 brands['generic_name'] = df['generic']
 brands['cheapest_brand_ref'] = None  # Regular brands don't need this
 
+# 3b. Parsed strength, so the apps can resolve the brand first and then
+# pick the strength numerically instead of fuzzy-matching the whole string
+parsed = df['strength'].apply(parse_strength)
+brands['brand'] = df['brand name']
+brands['strength'] = df['strength']
+brands['strength_values'] = parsed.apply(lambda p: format_values(p[0]))
+brands['strength_units'] = parsed.apply(lambda p: '+'.join(p[1]))
+brands['per_volume'] = parsed.apply(lambda p: p[2])
+
 # 4. Create 'Generic Search' Rows (The Logic Change)
 # We want to find the row with the lowest price for every generic.
 # Instead of groupby().min(), we SORT by price and pick the first one.
@@ -27,6 +41,8 @@ cheapest_rows = brands.sort_values('price').drop_duplicates('generic_name').copy
 # Now we transform these rows so they can be searched by their Generic Name
 cheapest_rows['cheapest_brand_ref'] = cheapest_rows['brand_name'] # Save the real brand name (e.g. "Abeclib 200 mg")
 cheapest_rows['brand_name'] = cheapest_rows['generic_name']       # Set lookup key to Generic Name (e.g. "Abemaciclib")
+cheapest_rows['brand'] = cheapest_rows['generic_name']            # Generic rows are looked up by name only, no strength
+cheapest_rows[['strength', 'strength_values', 'strength_units', 'per_volume']] = None
 
 # 5. Combine everything
 final_df = pd.concat([brands, cheapest_rows], ignore_index=True)
@@ -40,5 +56,17 @@ final_df = final_df.sort_values(by=['generic_name', 'brand_name'])
 # 6. Save
 final_df.to_csv('formatted_medicines_v3.csv', index=False)
 
+# 7. Binary snapshot of the lookup structures, memory-mapped by the apps
+# so they skip CSV parsing and dict building on startup
+Catalog.from_frame(final_df).save('formatted_medicines_v3.snapshot', 'formatted_medicines_v3.csv')
+
+# 8. Tesseract user dictionary for ocr_engine.use_user_dictionary: brand/
+# generic/unit words, and strength formats (legacy --oem 0 engine only)
+words = user_words(pd.concat([df['brand name'], df['generic'], df['strength'], pd.Series(DOSAGE_FORM_WORDS)]))
+with open('medicine.user-words', 'w', encoding='utf-8') as f:
+    f.write('\n'.join(words) + '\n')
+with open('medicine.user-patterns', 'w', encoding='utf-8') as f:
+    f.write('\n'.join(user_patterns(df['strength'])) + '\n')
+
 print("Process Complete. Generic search rows now point to the cheapest brand.")
 print(final_df[['brand_name', 'price', 'cheapest_brand_ref']].head(10))
\ No newline at end of file
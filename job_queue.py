@@ -0,0 +1,210 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# -------------------------------------------------------------------------
+# Persistent OCR job queue (SQLite) + a bounded pool of worker threads
+# -------------------------------------------------------------------------
+DEFAULT_QUEUE_PATH = os.path.join(os.path.expanduser('~'), '.pharmaprice', 'ocr_jobs.sqlite3')
+DEFAULT_MAX_PENDING = 32
+KEEP_FINISHED_SECONDS = 24 * 3600
+HEARTBEAT_SECONDS = 5      # running jobs are touched this often by their process
+STALE_SECONDS = 30         # no heartbeat for this long: the process died, queue it again
+POLL_SECONDS = 1.0         # idle workers recheck the file for jobs other processes queued
+
+class QueueFull(Exception):
+    """Raised by submit() when max_pending jobs are already waiting or running."""
+
+class JobQueue:
+    """
+    Jobs live in one SQLite file: queued -> running -> done/failed. The
+    uploaded bytes are kept only until the job finishes. Several processes
+    can share the file: a job is claimed by one conditional UPDATE, and
+    each running job carries its process's worker id and heartbeat, so only
+    jobs of a process that stopped beating (crashed) are queued again.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, max_pending=DEFAULT_MAX_PENDING):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.max_pending = max_pending
+        self.worker_id = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                               id TEXT PRIMARY KEY, status TEXT NOT NULL, image BLOB,
+                               result TEXT, error TEXT, created REAL NOT NULL,
+                               started REAL, finished REAL)""")
+        columns = {row[1] for row in self.db.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (('worker', 'TEXT'), ('heartbeat', 'REAL')):
+            if column not in columns:
+                # files written before workers had ids
+                self.db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created)")
+        self.db.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+                        (time.time() - KEEP_FINISHED_SECONDS,))
+        threading.Thread(target=self._beat, daemon=True, name="ocr-queue-heartbeat").start()
+
+    def _beat(self):
+        """Keeps this process's running jobs fresh so other processes leave them alone."""
+        while True:
+            with self.lock:
+                self.db.execute("UPDATE jobs SET heartbeat = ? WHERE status = 'running' AND worker = ?",
+                                (time.time(), self.worker_id))
+            time.sleep(HEARTBEAT_SECONDS)
+
+    def _requeue_stale(self):
+        """Jobs whose process stopped beating (crashed, killed) go back to the queue."""
+        self.db.execute("UPDATE jobs SET status = 'queued', started = NULL, worker = NULL "
+                        "WHERE status = 'running' AND (heartbeat IS NULL OR heartbeat < ?)",
+                        (time.time() - STALE_SECONDS,))
+
+    def pending(self):
+        """Jobs queued or running."""
+        with self.lock:
+            return self._pending()
+
+    def _pending(self):
+        return self.db.execute(
+            "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+
+    def submit(self, image_bytes):
+        """Queues an image and returns the job id, or raises QueueFull."""
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            if self._pending() >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} jobs already pending")
+            self.db.execute("INSERT INTO jobs (id, status, image, created) VALUES (?, 'queued', ?, ?)",
+                            (job_id, image_bytes, time.time()))
+            # waiters in wait() share the condition, so wake everyone
+            self.available.notify_all()
+        return job_id
+
+    def claim(self, timeout=None):
+        """
+        Oldest queued job as (id, image bytes), marked running by this
+        process; None after timeout. Another process may claim the same row
+        first, so the UPDATE only counts if the job was still queued.
+        """
+        claimed = self.claim_many(1, timeout)
+        return claimed[0] if claimed else None
+
+    def claim_many(self, limit, timeout=None):
+        """
+        Like claim(), but up to `limit` of the oldest queued jobs at once, as
+        a list of (id, image bytes). Doesn't wait for the batch to fill: as
+        soon as any job is queued it returns what is there; [] after timeout.
+        """
+        with self.lock:
+            while True:
+                self._requeue_stale()
+                rows = self.db.execute("SELECT id, image FROM jobs WHERE status = 'queued' "
+                                       "ORDER BY created LIMIT ?", (limit,)).fetchall()
+                now = time.time()
+                claimed = [row for row in rows if self.db.execute(
+                    "UPDATE jobs SET status = 'running', started = ?, heartbeat = ?, worker = ? "
+                    "WHERE id = ? AND status = 'queued'", (now, now, self.worker_id, row[0])).rowcount == 1]
+                if claimed:
+                    return claimed
+                if rows:
+                    continue
+                # submits from other processes don't notify this condition
+                if not self.available.wait(timeout):
+                    return []
+
+    def finish(self, job_id, result):
+        self._close(job_id, 'done', json.dumps(result), None)
+
+    def fail(self, job_id, error):
+        self._close(job_id, 'failed', None, error)
+
+    def _close(self, job_id, status, result, error):
+        with self.lock:
+            self.db.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?, image = NULL "
+                            "WHERE id = ?", (status, result, error, time.time(), job_id))
+            self.available.notify_all()
+
+    def get(self, job_id):
+        """{'id', 'status', 'result', 'error', 'position', timings} or None for an unknown id."""
+        with self.lock:
+            row = self.db.execute("SELECT status, result, error, created, started, finished "
+                                  "FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            status, result, error, created, started, finished = row
+            position = None
+            if status == 'queued':
+                position = self.db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued' "
+                                           "AND created < ?", (created,)).fetchone()[0]
+        return {
+            'id': job_id,
+            'status': status,
+            'position': position,
+            'result': json.loads(result) if result else None,
+            'error': error,
+            'queued_seconds': (started or time.time()) - created,
+            'run_seconds': (finished - started) if finished and started else None,
+        }
+
+    def wait(self, job_id, timeout=None):
+        """Blocks until the job is done/failed (or timeout) and returns get(job_id)."""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in ('done', 'failed'):
+                return job
+            remaining = None if deadline is None else deadline - time.time()
+            if remaining is not None and remaining <= 0:
+                return job
+            with self.lock:
+                self.available.wait(min(remaining, 1.0) if remaining is not None else 1.0)
+
+def start_workers(jobs, handler, workers=None, batch_handler=None, batch_size=8):
+    """
+    Runs handler(image_bytes) -> result for queued jobs on `workers` daemon
+    threads. A slow image only holds up its own thread, never the web server.
+    Idle threads poll every POLL_SECONDS for jobs queued by other processes.
+    With batch_handler([image_bytes, ...]) -> [result or Exception, ...]
+    each thread takes up to batch_size queued jobs at a time and hands them
+    over together (EasyOCR recognizes all their line crops in one pass).
+    """
+    def run(claimed):
+        job_id, image_bytes = claimed
+        try:
+            jobs.finish(job_id, handler(image_bytes))
+        except Exception as e:
+            jobs.fail(job_id, str(e))
+
+    def loop():
+        while True:
+            claimed = jobs.claim(timeout=POLL_SECONDS)
+            if claimed is not None:
+                run(claimed)
+
+    def batch_loop():
+        while True:
+            claimed = jobs.claim_many(batch_size, timeout=POLL_SECONDS)
+            if not claimed:
+                continue
+            if len(claimed) == 1:
+                run(claimed[0])
+                continue
+            try:
+                results = batch_handler([image_bytes for _, image_bytes in claimed])
+            except Exception as e:
+                results = [e] * len(claimed)
+            for (job_id, _), result in zip(claimed, results):
+                if isinstance(result, Exception):
+                    jobs.fail(job_id, str(result))
+                else:
+                    jobs.finish(job_id, result)
+
+    threads = [threading.Thread(target=batch_loop if batch_handler else loop, daemon=True, name=f"ocr-worker-{i}")
+               for i in range(workers or os.cpu_count() or 1)]
+    for thread in threads:
+        thread.start()
+    return threads
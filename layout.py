@@ -0,0 +1,149 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import cv2
+import numpy as np
+
+import ocr_engine
+
+# -------------------------------------------------------------------------
+# Cheap layout stage: find text lines with morphology, keep the Rx body,
+# OCR only those crops
+# -------------------------------------------------------------------------
+LINE_CONFIG = '--psm 7 -l eng'
+
+def to_gray(image):
+    img = np.array(image)
+    if img.ndim == 2:
+        return img
+    return cv2.cvtColor(img, cv2.COLOR_RGBA2GRAY if img.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+
+def text_ink(gray):
+    """Dark strokes binarized locally (ink = 255), with page/table rules removed."""
+    height, width = gray.shape
+    ink = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15)
+
+    # long vertical/horizontal rules would glue neighbouring lines together
+    rules = cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (1, height // 30)))
+    rules |= cv2.morphologyEx(ink, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (width // 8, 1)))
+    return cv2.subtract(ink, rules)
+
+def join_lines(ink):
+    """Characters joined horizontally into one blob per text line."""
+    return cv2.morphologyEx(ink, cv2.MORPH_CLOSE,
+                            cv2.getStructuringElement(cv2.MORPH_RECT, (max(ink.shape[1] // 60, 9), 1)))
+
+def find_text_lines(gray):
+    """
+    Bounding boxes (x, y, w, h) of text lines, top to bottom. Dark strokes
+    are binarized locally, page/table rules removed, then characters are
+    joined horizontally into line blobs.
+    """
+    height = gray.shape[0]
+    contours, _ = cv2.findContours(join_lines(text_ink(gray)), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    boxes = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if 8 <= h <= height // 15 and w >= 2 * h:
+            boxes.append((x, y, w, h))
+    return sorted(boxes, key=lambda box: (box[1], box[0]))
+
+def select_rx_body(boxes, width, gap=2.5):
+    """
+    The medication block: lines on the main sheet (the x band most line
+    width falls in, so neighbouring papers in a photo drop out), split into
+    blocks at vertical gaps over `gap` line heights; the block holding the
+    most text wins. Headers, footers and stray labels outside it are dropped.
+    """
+    if not boxes:
+        return []
+
+    coverage = np.zeros(width, dtype=np.int64)
+    for x, _, w, _ in boxes:
+        coverage[x:x + w] += 1
+    peak = int(coverage.argmax())
+    dense = coverage >= max(coverage[peak] * 0.3, 1)
+    left = peak
+    while left > 0 and dense[left - 1]:
+        left -= 1
+    right = peak
+    while right < width - 1 and dense[right + 1]:
+        right += 1
+    sheet = [box for box in boxes if left <= box[0] + box[2] / 2 <= right]
+
+    line_height = float(np.median([h for _, _, _, h in sheet]))
+    blocks, bottom = [], None
+    for box in sorted(sheet, key=lambda box: box[1]):
+        if bottom is None or box[1] - bottom > gap * line_height:
+            blocks.append([])
+        blocks[-1].append(box)
+        bottom = max(bottom or 0, box[1] + box[3])
+    body = max(blocks, key=lambda block: sum(w * h for _, _, w, h in block))
+    return sorted(body, key=lambda box: (box[1], box[0]))
+
+def _read_line(gray, box, pad):
+    x, y, w, h = box
+    x0, y0 = max(x - pad, 0), max(y - pad, 0)
+    crop = gray[y0:y + h + pad, x0:x + w + pad]
+    _, crop = cv2.threshold(crop, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    parts = ocr_engine.image_to_lines(crop, LINE_CONFIG)['lines']
+    if not parts:
+        return None, crop.size
+    return {
+        'text': ' '.join(part['text'] for part in parts),
+        'box': [x, y, w, h],
+        'conf': sum(part['conf'] for part in parts) / len(parts),
+    }, crop.size
+
+def layout_ocr(image, workers=None, pad=4, min_lines=3):
+    """
+    OCR of the Rx body only, one line crop per Tesseract call, run on a
+    thread pool. Same {'text', 'lines'} shape as image_to_lines plus
+    'stats' (lines found/read, share of pixels sent to OCR). Falls back to
+    the whole page when fewer than min_lines body lines are found.
+    """
+    gray = to_gray(image)
+    boxes = find_text_lines(gray)
+    body = select_rx_body(boxes, gray.shape[1])
+    if len(body) < min_lines:
+        _, page = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        result = ocr_engine.image_to_lines(page, '--psm 6 -l eng')
+        result['stats'] = {'lines_found': len(boxes), 'lines_read': len(result['lines']),
+                           'pixel_share': 1.0, 'fallback': True}
+        return result
+
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+        read = list(pool.map(lambda box: _read_line(gray, box, pad), body))
+    lines = [line for line, _ in read if line]
+    return {
+        'text': '\n'.join(line['text'] for line in lines),
+        'lines': lines,
+        'stats': {'lines_found': len(boxes), 'lines_read': len(body),
+                  'pixel_share': sum(size for _, size in read) / gray.size, 'fallback': False},
+    }
+
+def stream_lines(image, rx_only=False, workers=None, pad=4):
+    """
+    Yields recognized lines as soon as each one finishes, as
+    {'index', 'text', 'box', 'conf'} with index = top-to-bottom position.
+    Lines are queued top first, so the first results arrive after about one
+    line's OCR time instead of the whole page's.
+    """
+    gray = to_gray(image)
+    boxes = find_text_lines(gray)
+    if rx_only:
+        boxes = select_rx_body(boxes, gray.shape[1])
+    if not boxes:
+        # nothing segmented (tiny crops, screenshots): one whole-page pass
+        _, page = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        for index, line in enumerate(ocr_engine.image_to_lines(page, '--psm 6 -l eng')['lines']):
+            yield dict(line, index=index)
+        return
+
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+        futures = {pool.submit(_read_line, gray, box, pad): index for index, box in enumerate(boxes)}
+        for future in as_completed(futures):
+            line, _ = future.result()
+            if line:
+                line['index'] = futures[future]
+                yield line
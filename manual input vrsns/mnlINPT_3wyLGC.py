@@ -1,12 +1,20 @@
+import os
+import sys
 import pandas as pd
 from thefuzz import process
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import build_generic_index, build_strength_index, cheapest_alternative
+from matching import CatalogMatcher
+
 try:
     df = pd.read_csv(r'F:\pybls\formatted_medicines_v3.csv')
     
     df = df.drop_duplicates(subset=['brand_name'], keep='first')
     
     medicines = df.set_index('brand_name').to_dict('index')
+    generic_index = build_generic_index(df)
+    matcher = CatalogMatcher(medicines.keys(), build_strength_index(df))
     print(f"--- Database Loaded: {len(medicines)} items found ---")
 
 except FileNotFoundError:
@@ -23,7 +31,10 @@ while True:
     if not user_input:
         continue
 
-    match_result = process.extractOne(user_input, medicines.keys())
+    # Brand (exact/typo) + numeric strength first, full fuzzy scan otherwise
+    match_result = matcher.fast_match(user_input, score_cutoff=65)
+    if match_result is None:
+        match_result = process.extractOne(user_input, medicines.keys())
     
     if match_result:
         best_match, score = match_result
@@ -42,12 +53,10 @@ while True:
             print(f"💰 PRICE:   ৳{current_price:.2f}")
             print(f"🧬 GENERIC: {generic}")
 
-            alternatives = df[df['generic_name'] == generic]
+            cheapest = cheapest_alternative(generic, generic_index, df)
             
-            if not alternatives.empty:
-                cheapest_row = alternatives.loc[alternatives['price'].idxmin()]
-                cheapest_name = cheapest_row['brand_name']
-                cheapest_price = cheapest_row['price']
+            if cheapest:
+                cheapest_name, cheapest_price = cheapest
 
                 if cheapest_price < current_price:
                     savings = current_price - cheapest_price
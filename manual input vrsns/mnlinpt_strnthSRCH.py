@@ -1,6 +1,11 @@
+import os
+import sys
 import pandas as pd
 from thefuzz import process
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import build_strength_index
+from matching import CatalogMatcher
 
 try:
     
@@ -9,6 +14,7 @@ try:
     df = df.drop_duplicates(subset=['brand_name'], keep='first')
     
     medicines = df.set_index('brand_name').to_dict('index')
+    matcher = CatalogMatcher(medicines.keys(), build_strength_index(df))
     print(f"--- Database Loaded: {len(medicines)} items found ---")
 except FileNotFoundError:
     print("Error: 'formatted_medicines_v2.csv' not found. Run your processing script first.")
@@ -19,12 +25,16 @@ while True:
     user_input = input("Enter Medicine & Strength (e.g., 'Tivizid 300') or 'exit': ").strip().lower()
 
     if user_input in ["quit", "exit"]:
+        print(f"Brand/strength fast path served {matcher.fast_hits}/{matcher.lookups} searches ({matcher.fast_path_rate:.0%})")
         break
 
     if not user_input:
         continue
 
-    match_result = process.extractOne(user_input, medicines.keys())
+    # Brand (exact/typo) + numeric strength first, full fuzzy scan otherwise
+    match_result = matcher.fast_match(user_input, score_cutoff=65)
+    if match_result is None:
+        match_result = process.extractOne(user_input, medicines.keys())
     
     if match_result:
         best_match, score = match_result
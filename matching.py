@@ -0,0 +1,285 @@
+import re
+import numpy as np
+from rapidfuzz import fuzz, process
+from rapidfuzz.distance import Levenshtein
+from rapidfuzz.utils import default_process
+
+from catalog import pick_strength, query_numbers
+
+# -------------------------------------------------------------------------
+# Fuzzy matching against the catalog keys (brand + strength strings)
+# -------------------------------------------------------------------------
+
+# doses and dosage forms typed around a brand: "tab napa 500mg"
+_DOSE_WORDS = re.compile(r'\d+(?:\.\d+)?\s*(?:mg|ml|mcg|gm|g|iu|%)?|'
+                         r'\b(?:tab|tablet|cap|capsule|syp|syrup|inj|injection|susp)s?\b\.?', re.IGNORECASE)
+
+# thefuzz strips chars 128-255 before its default processing ("ascii dammit")
+_ASCII_TABLE = {i: None for i in range(128, 256)}
+
+def normalize(text):
+    """
+    Same normalization thefuzz.process.extractOne applies to query and
+    choices: drop latin-1 chars, keep letters/numbers, lowercase, trim.
+    """
+    return default_process(str(text).translate(_ASCII_TABLE))
+
+def trigrams(text):
+    """Set of 3-char grams, padded so word starts count double."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class TrigramIndex:
+    """
+    Inverted index gram -> sorted row ids over the normalized names.
+    Candidates are ranked by how many grams they share with the query,
+    so the cost depends on the posting lists touched, not the catalog size.
+    """
+
+    def __init__(self, texts, max_postings=20000):
+        postings = {}
+        for idx, text in enumerate(texts):
+            for gram in trigrams(text):
+                postings.setdefault(gram, []).append(idx)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.max_postings = max_postings
+
+    def candidates(self, query, limit=300):
+        """Row ids (ascending) of the top `limit` names by shared-gram count."""
+        lists = [self.postings[gram] for gram in trigrams(query) if gram in self.postings]
+        if not lists:
+            return []
+
+        # grams like " mg" hit most of the catalog and barely help the ranking,
+        # skip them unless nothing rarer matched
+        kept = [ids for ids in lists if len(ids) <= self.max_postings]
+        if not kept:
+            kept = [min(lists, key=len)]
+
+        ids, counts = np.unique(np.concatenate(kept), return_counts=True)
+        if len(ids) > limit:
+            ids = ids[np.argpartition(-counts, limit)[:limit]]
+        return np.sort(ids).tolist()
+
+def _deletes(word, distance):
+    """The word plus every string made by deleting up to `distance` chars."""
+    found = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        found |= frontier
+    return found
+
+def typo_budget(word, max_distance=2):
+    """Edits allowed for a token: none for 1-2 chars, 1 up to 5 chars, else 2."""
+    if len(word) < 3:
+        return 0
+    if len(word) <= 5:
+        return min(1, max_distance)
+    return max_distance
+
+class DeletionIndex:
+    """
+    SymSpell-style dictionary: every deletion variant of every word maps
+    back to the words it came from, so a typo within the edit budget is
+    found with a handful of dict lookups instead of a fuzzy scan.
+    Only the first prefix_length chars are expanded (as SymSpell does),
+    which keeps long generic names from blowing up the dictionary.
+    """
+
+    def __init__(self, words, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = set(words)
+        self.deletes = {}
+        for word in self.words:
+            budget = typo_budget(word, max_distance)
+            for variant in _deletes(word[:prefix_length], budget):
+                self.deletes.setdefault(variant, []).append(word)
+
+    def lookup(self, word):
+        """Closest word within the edit budget, or None if none/ambiguous."""
+        if word in self.words:
+            return word
+
+        budget = typo_budget(word, self.max_distance)
+        best, best_distance, ambiguous = None, budget + 1, False
+        seen = set()
+        for variant in _deletes(word[:self.prefix_length], budget):
+            for candidate in self.deletes.get(variant, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = Levenshtein.distance(word, candidate, score_cutoff=budget)
+                if distance < best_distance:
+                    best, best_distance, ambiguous = candidate, distance, False
+                elif distance == best_distance:
+                    ambiguous = True
+
+        if best is None or ambiguous:
+            return None
+        return best
+
+class CatalogMatcher:
+    """
+    Holds the catalog names normalized once, so matching doesn't redo
+    the lowercase/strip work on ~22k strings for every query.
+    """
+
+    def __init__(self, names, strength_index=None):
+        # extractOne skips None/NaN choices (the CSV has one blank brand_name)
+        self.names = [name for name in names if name is not None and name == name]
+        self.processed = [normalize(name) for name in self.names]
+        # first word is the brand, e.g. "tivizid 300 mg 150 mg" -> "tivizid"
+        self.brand_tokens = [text.split(' ')[0] for text in self.processed]
+        self.index = TrigramIndex(self.processed)
+
+        # brand token -> catalog rows, for the typo fast path
+        self.brand_rows = {}
+        for idx, token in enumerate(self.brand_tokens):
+            self.brand_rows.setdefault(token, []).append(idx)
+        self.typo_index = DeletionIndex(self.brand_rows.keys())
+        self.lookups = 0
+        self.fast_hits = 0
+
+        # normalized brand -> [(strength values, name)], see build_strength_index
+        self.strengths = {}
+        if strength_index:
+            for brand, entries in strength_index.items():
+                self.strengths.setdefault(normalize(brand), []).extend(entries)
+        self.brand_keys = list(self.strengths)
+        self.brand_typos = DeletionIndex(self.brand_keys)
+
+    @property
+    def fast_path_rate(self):
+        """Share of fast_match() calls answered without scanning every name."""
+        return self.fast_hits / self.lookups if self.lookups else 0.0
+
+    def strength_match(self, query, score_cutoff=60):
+        """
+        Brand first, strength second: resolve the typed brand exactly, by
+        typo lookup, or by fuzzy over the distinct brands only, then pick
+        the strength from the typed numbers ("tivizid 300").
+        Returns (best_match, score) or None.
+        """
+        brand_text = normalize(_DOSE_WORDS.sub(' ', str(query)))
+        if not brand_text or not self.strengths:
+            return None
+
+        brand = brand_text if brand_text in self.strengths else self.brand_typos.lookup(brand_text)
+        if brand is None:
+            result = process.extractOne(brand_text, self.brand_keys, scorer=fuzz.WRatio, score_cutoff=85)
+            if result is None:
+                return None
+            brand = result[0]
+
+        name = pick_strength(self.strengths[brand], query_numbers(query))
+        if name is None:
+            return None
+
+        score = int(round(fuzz.WRatio(normalize(query), normalize(name))))
+        return (name, score) if score >= score_cutoff else None
+
+    def fast_match(self, query, score_cutoff=60):
+        """
+        Typo fast path for typed searches like "tivizd" or "tivizid 300":
+        resolve the brand token through the deletion dictionary (edit
+        distance <= 2), then pick the strength among that brand's rows.
+        Returns (best_match, score) or None, so callers fall back to fuzzy.
+        With a strength index the brand/strength path is used instead.
+        """
+        self.lookups += 1
+        if self.strengths:
+            result = self.strength_match(query, score_cutoff)
+            if result is not None:
+                self.fast_hits += 1
+            return result
+
+        query = normalize(query)
+        if not query:
+            return None
+
+        brand = self.typo_index.lookup(query.split(' ')[0])
+        if brand is None:
+            return None
+
+        rows = self.brand_rows[brand]
+        result = process.extractOne(query, [self.processed[idx] for idx in rows],
+                                    scorer=fuzz.WRatio)
+        score = int(round(result[1]))
+        if score < score_cutoff:
+            return None
+
+        self.fast_hits += 1
+        return self.names[rows[result[2]]], score
+
+    def _ratio_candidates(self, query, top_n):
+        """Linear prefilter: plain ratio against the full names and brand tokens."""
+        candidates = set()
+        for choices in (self.processed, self.brand_tokens):
+            for _, _, idx in process.extract(query, choices, scorer=fuzz.ratio, limit=top_n):
+                candidates.add(idx)
+        return sorted(candidates)
+
+    def match_one(self, query, score_cutoff=60, top_n=300):
+        """
+        Two-stage lookup for a single query. The trigram index picks the
+        top_n candidates (plain-ratio scan if it finds none), then only those
+        get the expensive WRatio. Returns (best_match, score) or None.
+        """
+        query = normalize(query)
+        if not query:
+            return None
+
+        # both return catalog order, so ties resolve like extractOne
+        candidates = self.index.candidates(query, limit=top_n)
+        if not candidates:
+            candidates = self._ratio_candidates(query, top_n)
+        result = process.extractOne(query, [self.processed[idx] for idx in candidates],
+                                    scorer=fuzz.WRatio)
+        if result is None:
+            return None
+
+        score = int(round(result[1]))
+        if score < score_cutoff:
+            return None
+        return self.names[candidates[result[2]]], score
+
+    def match_batch(self, queries, score_cutoff=60, workers=-1, chunk_size=64, top_n=300):
+        """
+        Matches all queries in one go with a WRatio score matrix (C++,
+        multi-threaded). Returns one (best_match, score) or None per query,
+        the same as match_one(query) for each: the matrix columns are the
+        union of the chunk's candidates, but every row only picks among its
+        own, so a line's match doesn't depend on the other lines.
+        """
+        results = []
+        queries = [normalize(q) for q in queries]
+
+        # chunk the rows so a big batch doesn't allocate a huge matrix
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            own = [(self.index.candidates(query, limit=top_n) or self._ratio_candidates(query, top_n))
+                   if query else [] for query in chunk]
+            columns = sorted(set().union(*own))
+            if not columns:
+                results.extend([None] * len(chunk))
+                continue
+            position = {idx: col for col, idx in enumerate(columns)}
+            scores = process.cdist(chunk, [self.processed[idx] for idx in columns], scorer=fuzz.WRatio,
+                                   dtype=np.float64, workers=workers)
+            # other rows' candidates can't win; columns stay in catalog order,
+            # so ties resolve like match_one's extractOne over the candidates
+            mask = np.ones(scores.shape, dtype=bool)
+            for row, candidates in enumerate(own):
+                mask[row, [position[idx] for idx in candidates]] = False
+            scores[mask] = -1
+            best = scores.argmax(axis=1)
+            for row, col in enumerate(best):
+                score = int(round(float(scores[row, col])))
+                if own[row] and score >= score_cutoff:
+                    results.append((self.names[columns[col]], score))
+                else:
+                    results.append(None)
+
+        return results
@@ -0,0 +1,145 @@
+import itertools
+import json
+import os
+import sqlite3
+import threading
+import time
+import cv2
+import numpy as np
+
+from layout import find_text_lines, select_rx_body
+from ocr_cache import DEFAULT_CACHE_PATH
+
+# -------------------------------------------------------------------------
+# Near-duplicate prescriptions: perceptual hash of the Rx body + multi-index
+# hashing. A hit is only a suggestion for the user to confirm: a small hash
+# can't tell two patients' sheets apart reliably (bench_near_duplicates.py)
+# -------------------------------------------------------------------------
+HASH_BITS = 64
+DEFAULT_THRESHOLD = 10  # most re-shots of a body land <= 10 bits apart, edited bodies >= 26
+
+def phash(gray):
+    """
+    64-bit DCT perceptual hash of a grayscale/binary image (e.g. the Otsu
+    output of preprocess_image). Robust to re-compression, scaling, small
+    crops and lighting changes, unlike a hash of the file bytes.
+    """
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+def rx_body(gray):
+    """
+    The image cropped to the Rx-body lines (layout.select_rx_body). The
+    letterhead and footer of a clinic's pad are the same on every patient's
+    sheet and would dominate a whole-page hash. The whole page when no body
+    is found.
+    """
+    boxes = select_rx_body(find_text_lines(gray), gray.shape[1])
+    if not boxes:
+        return gray
+    left, top = min(x for x, _, _, _ in boxes), min(y for _, y, _, _ in boxes)
+    right, bottom = max(x + w for x, _, w, _ in boxes), max(y + h for _, y, _, h in boxes)
+    return gray[top:bottom, left:right]
+
+class MultiIndexHash:
+    """
+    Hamming-radius search over 64-bit hashes. The hash is split into 4
+    16-bit chunks with one dict each; if two hashes are within r bits, at
+    least one chunk is within r // 4 bits (pigeonhole), so only a few
+    hundred dict probes are needed however many hashes are stored.
+    """
+
+    def __init__(self, chunks=4):
+        self.chunks = chunks
+        self.chunk_bits = HASH_BITS // chunks
+        self.tables = [{} for _ in range(chunks)]
+        self.hashes = []
+        self.values = []
+
+    def _split(self, value):
+        mask = (1 << self.chunk_bits) - 1
+        return [(value >> (i * self.chunk_bits)) & mask for i in range(self.chunks)]
+
+    def _neighbours(self, chunk, radius):
+        yield chunk
+        for r in range(1, radius + 1):
+            for bits in itertools.combinations(range(self.chunk_bits), r):
+                flipped = chunk
+                for bit in bits:
+                    flipped ^= 1 << bit
+                yield flipped
+
+    def add(self, value, payload):
+        idx = len(self.hashes)
+        self.hashes.append(value)
+        self.values.append(payload)
+        for table, chunk in zip(self.tables, self._split(value)):
+            table.setdefault(chunk, []).append(idx)
+
+    def search(self, value, max_distance):
+        """[(distance, payload), ...] within max_distance, closest first."""
+        radius = max_distance // self.chunks
+        seen = set()
+        found = []
+        for table, chunk in zip(self.tables, self._split(value)):
+            for probe in self._neighbours(chunk, radius):
+                for idx in table.get(probe, ()):
+                    if idx in seen:
+                        continue
+                    seen.add(idx)
+                    distance = hamming(value, self.hashes[idx])
+                    if distance <= max_distance:
+                        found.append((distance, self.values[idx]))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def __len__(self):
+        return len(self.hashes)
+
+class NearDuplicateIndex:
+    """
+    Prior analyses keyed by the perceptual hash of the Rx body, persisted
+    next to the OCR cache (same SQLite file) and held in a MultiIndexHash
+    for lookups. Older whole-page hashes (phash_analyses) are not used.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, threshold=DEFAULT_THRESHOLD):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.threshold = threshold
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS rx_body_analyses (
+                               id INTEGER PRIMARY KEY, phash TEXT NOT NULL,
+                               result TEXT NOT NULL, created REAL NOT NULL)""")
+        self.index = MultiIndexHash()
+        self.last_id = 0
+        self._load_new()
+
+    def _load_new(self):
+        # other processes may have added analyses since we last looked
+        rows = self.db.execute("SELECT id, phash, result FROM rx_body_analyses WHERE id > ? ORDER BY id",
+                               (self.last_id,)).fetchall()
+        for row_id, value, result in rows:
+            self.index.add(int(value, 16), json.loads(result))
+            self.last_id = row_id
+
+    def find(self, gray):
+        """(distance, prior result) of the closest earlier analysis, or None."""
+        value = phash(rx_body(gray))
+        with self.lock:
+            self._load_new()
+            found = self.index.search(value, self.threshold)
+        return found[0] if found else None
+
+    def add(self, gray, result):
+        """Remembers the analysis result (anything JSON-serializable) for this image."""
+        value = phash(rx_body(gray))
+        with self.lock:
+            self.db.execute("INSERT INTO rx_body_analyses (phash, result, created) VALUES (?, ?, ?)",
+                            (f"{value:016x}", json.dumps(result), time.time()))
+            self._load_new()
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# -------------------------------------------------------------------------
+# Disk cache for OCR results, shared by the Streamlit and Flask front ends
+# -------------------------------------------------------------------------
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.pharmaprice', 'ocr_cache.sqlite3')
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+def cache_key(image_bytes, config='', variant='raw', backend=''):
+    """sha256 of the uploaded bytes + OCR config + preprocessing variant + OCR backend."""
+    digest = hashlib.sha256(image_bytes)
+    digest.update(b'\0' + config.encode('utf-8') + b'\0' + variant.encode('utf-8') +
+                  b'\0' + backend.encode('utf-8'))
+    return digest.hexdigest()
+
+class OcrCache:
+    """
+    Content-addressed OCR results (raw text + line boxes) in one SQLite file.
+    Least recently used entries are evicted once the stored results exceed
+    max_bytes. SQLite handles the locking, so several processes can share it.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        # one connection per process; the lock covers threaded servers
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS ocr_results (
+                               key TEXT PRIMARY KEY, result TEXT NOT NULL,
+                               size INTEGER NOT NULL, last_used REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS ocr_results_lru ON ocr_results (last_used)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS ocr_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.db.execute("INSERT OR IGNORE INTO ocr_stats VALUES ('hits', 0), ('misses', 0)")
+
+    def get(self, key):
+        """Cached {'text': ..., 'lines': [...]} for key, or None."""
+        with self.lock:
+            row = self.db.execute("SELECT result FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.db.execute("UPDATE ocr_stats SET value = value + 1 WHERE name = 'misses'")
+                return None
+
+            self.db.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.db.execute("UPDATE ocr_stats SET value = value + 1 WHERE name = 'hits'")
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        """Stores a result and evicts the least recently used ones over budget."""
+        payload = json.dumps(result)
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO ocr_results VALUES (?, ?, ?, ?)",
+                            (key, payload, len(payload), time.time()))
+            self._evict()
+
+    def _evict(self):
+        total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM ocr_results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.db.execute("SELECT key, size FROM ocr_results ORDER BY last_used").fetchall():
+            self.db.execute("DELETE FROM ocr_results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        """Hit/miss counts across every process using this file, plus size."""
+        with self.lock:
+            counts = dict(self.db.execute("SELECT name, value FROM ocr_stats").fetchall())
+            entries, size = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ocr_results").fetchone()
+        lookups = counts['hits'] + counts['misses']
+        return {
+            'hits': counts['hits'],
+            'misses': counts['misses'],
+            'hit_rate': counts['hits'] / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+        }
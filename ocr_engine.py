@@ -0,0 +1,491 @@
+import importlib.util
+import os
+import queue
+import shlex
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+import numpy as np
+import pytesseract
+from PIL import Image
+from pytesseract import Output
+
+from ocr_cache import cache_key
+
+# -------------------------------------------------------------------------
+# OCR backends: pytesseract (one tesseract subprocess per call), tesserocr
+# (engines loaded once and reused in-process) or easyocr (models loaded once,
+# batched recognition). Pick with OCR_BACKEND=pytesseract|tesserocr|easyocr|auto;
+# auto uses tesserocr when it is installed.
+# -------------------------------------------------------------------------
+TSV_FIELDS = ['level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+              'left', 'top', 'width', 'height', 'conf', 'text']
+
+def set_thread_limit(limit):
+    """
+    Caps Tesseract's OpenMP threads (OMP_THREAD_LIMIT). 1 gives the best
+    throughput when several images run at once; unset gives the lowest
+    latency for a single image. pytesseract subprocesses pick it up on the
+    next call; tesserocr only if set before its first engine is created.
+    """
+    if limit is None:
+        os.environ.pop('OMP_THREAD_LIMIT', None)
+    else:
+        os.environ['OMP_THREAD_LIMIT'] = str(limit)
+
+# tesseract CLI flags that are only shorthands for init-time variables
+FILE_FLAGS = {'--user-words': 'user_words_file', '--user-patterns': 'user_patterns_file'}
+
+def parse_config(config):
+    """
+    '--oem 1 --psm 6 -l eng -c key=value --user-words path' ->
+    (lang, oem, psm, variables, tessdata_dir).
+    """
+    lang, oem, psm, tessdata_dir = 'eng', 3, 3, None
+    variables = []
+    tokens = shlex.split(config)
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = tokens[i + 1] if i + 1 < len(tokens) else ''
+        if token == '--psm':
+            psm = int(value)
+        elif token == '--oem':
+            oem = int(value)
+        elif token == '-l':
+            lang = value
+        elif token == '--tessdata-dir':
+            tessdata_dir = value
+        elif token == '-c':
+            key, _, val = value.partition('=')
+            variables.append((key, val))
+        elif token in FILE_FLAGS:
+            variables.append((FILE_FLAGS[token], value))
+        else:
+            i += 1
+            continue
+        i += 2
+    return lang, oem, psm, tuple(variables), tessdata_dir
+
+def parse_tsv(tsv):
+    """Tesseract TSV output -> the dict pytesseract.image_to_data(output_type=DICT) gives."""
+    data = {field: [] for field in TSV_FIELDS}
+    for row in tsv.splitlines():
+        values = row.split('\t')
+        if len(values) < 11 or values[0] == 'level':
+            continue
+        values += [''] * (12 - len(values))
+        for field, value in zip(TSV_FIELDS, values):
+            if field == 'text':
+                data[field].append(value)
+            elif field == 'conf':
+                data[field].append(float(value))
+            else:
+                data[field].append(int(value))
+    return data
+
+def to_pil(image):
+    if isinstance(image, np.ndarray):
+        return Image.fromarray(image)
+    if image.mode not in ('1', 'L', 'RGB', 'RGBA'):
+        return image.convert('RGB')
+    return image
+
+class PytesseractBackend:
+    """The current behaviour: a tesseract process (and traineddata load) per call."""
+
+    name = 'pytesseract'
+
+    def image_to_string(self, image, config=''):
+        return pytesseract.image_to_string(image, config=config)
+
+    def image_to_data(self, image, config=''):
+        return pytesseract.image_to_data(image, config=config, output_type=Output.DICT)
+
+class TesserocrBackend:
+    """
+    In-process engines through tesserocr. Each (lang, oem, variables) combo
+    gets a pool of up to pool_size initialized PyTessBaseAPI handles, so
+    traineddata is loaded once per engine instead of once per image, and
+    concurrent callers each borrow their own handle (they aren't thread-safe).
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, pool_size=None):
+        import tesserocr
+        self.tesserocr = tesserocr
+        self.pool_size = pool_size or int(os.environ.get('OCR_POOL_SIZE', os.cpu_count() or 1))
+        self.pools = {}
+        self.created = {}
+        self.lock = threading.Lock()
+
+    def _new_api(self, key):
+        lang, oem, variables, tessdata_dir = key
+        # passed to Init, not SetVariable: the user-words/patterns files are
+        # only read while the dictionary loads
+        kwargs = {'lang': lang, 'oem': oem, 'variables': dict(variables)}
+        if tessdata_dir:
+            kwargs['path'] = tessdata_dir
+        return self.tesserocr.PyTessBaseAPI(**kwargs)
+
+    def _reserved_api(self, key, reserved=1):
+        """
+        _new_api for a slot already counted in created[key]. A failed init
+        (bad tessdata path or variable) gives back the reserved slots, or
+        callers would wait in pool.get() for engines that never come.
+        """
+        try:
+            return self._new_api(key)
+        except Exception:
+            with self.lock:
+                self.created[key] -= reserved
+            raise
+
+    @contextmanager
+    def _engine(self, key):
+        with self.lock:
+            pool = self.pools.setdefault(key, queue.LifoQueue())
+            create = pool.empty() and self.created.get(key, 0) < self.pool_size
+            if create:
+                self.created[key] = self.created.get(key, 0) + 1
+        api = self._reserved_api(key) if create else pool.get()
+        try:
+            yield api
+        finally:
+            pool.put(api)
+
+    def preload(self, config='', count=None):
+        """Initializes engines up front so the first requests don't pay for it."""
+        lang, oem, _, variables, tessdata_dir = parse_config(config)
+        key = (lang, oem, variables, tessdata_dir)
+        count = min(count or self.pool_size, self.pool_size)
+        with self.lock:
+            pool = self.pools.setdefault(key, queue.LifoQueue())
+            missing = count - self.created.get(key, 0)
+            self.created[key] = self.created.get(key, 0) + max(missing, 0)
+        for n in range(max(missing, 0)):
+            pool.put(self._reserved_api(key, reserved=missing - n))
+
+    @contextmanager
+    def _recognized(self, image, config):
+        lang, oem, psm, variables, tessdata_dir = parse_config(config)
+        with self._engine((lang, oem, variables, tessdata_dir)) as api:
+            api.SetPageSegMode(psm)
+            if isinstance(image, np.ndarray) and image.ndim == 2 and image.dtype == np.uint8:
+                # grayscale buffer straight in; SetImage would encode a BMP first
+                image = np.ascontiguousarray(image)
+                api.SetImageBytes(image.tobytes(), image.shape[1], image.shape[0], 1, image.shape[1])
+            else:
+                api.SetImage(to_pil(image))
+            api.Recognize()
+            yield api
+
+    def image_to_string(self, image, config=''):
+        with self._recognized(image, config) as api:
+            return api.GetUTF8Text()
+
+    def image_to_data(self, image, config=''):
+        with self._recognized(image, config) as api:
+            return parse_tsv(api.GetTSVText(0))
+
+class EasyOcrBackend:
+    """
+    EasyOCR with the detection + recognition models loaded once per process.
+    Detection runs per image, then the line crops of every image in a batch
+    go through one recognition call (EasyOCR's own readtext recognizes crop
+    by crop on CPU). Calls are serialized: torch already uses every core.
+    """
+
+    name = 'easyocr'
+    LANGS = {'eng': 'en'}
+
+    def __init__(self, batch_size=None):
+        import easyocr
+        self.easyocr = easyocr
+        self.batch_size = batch_size or int(os.environ.get('OCR_BATCH_SIZE', 16))
+        self.readers = {}
+        self.load_seconds = {}
+        self.lock = threading.Lock()
+
+    def _reader(self, config):
+        lang = parse_config(config)[0]
+        langs = tuple(self.LANGS.get(code, code) for code in lang.split('+'))
+        if langs not in self.readers:
+            start = time.perf_counter()
+            self.readers[langs] = self.easyocr.Reader(list(langs), gpu=False, verbose=False)
+            self.load_seconds[langs] = time.perf_counter() - start
+        return self.readers[langs]
+
+    def preload(self, config='', count=None):
+        with self.lock:
+            self._reader(config)
+
+    def images_to_data(self, images, config=''):
+        """image_to_data for several images with a single recognition pass."""
+        from easyocr.recognition import get_text
+        from easyocr.utils import get_image_list, reformat_input
+
+        with self.lock:
+            reader = self._reader(config)
+            # model input height, a module global in easyocr (64 unless a custom model sets it)
+            img_height = self.easyocr.easyocr.imgH
+            crops, owners = [], []
+            for n, image in enumerate(images):
+                img, grey = reformat_input(np.array(image))
+                horizontal, free = reader.detect(img)
+                image_list, _ = get_image_list(horizontal[0], free[0], grey, model_height=img_height)
+                crops.extend(image_list)
+                owners.extend([n] * len(image_list))
+
+            # crops are resized to the model height, so one width fits the batch
+            max_width = max([crop.shape[1] for _, crop in crops] + [img_height])
+            ignore_char = ''.join(set(reader.character) - set(reader.lang_char))
+            recognized = get_text(reader.character, img_height, int(max_width), reader.recognizer,
+                                  reader.converter, crops, ignore_char, batch_size=self.batch_size, workers=0,
+                                  device=reader.device) if crops else []
+
+        per_image = [[] for _ in images]
+        for n, (box, text, conf) in zip(owners, recognized):
+            per_image[n].append((box, text, conf))
+        return [boxes_to_data(boxes) for boxes in per_image]
+
+    def image_to_data(self, image, config=''):
+        return self.images_to_data([image], config)[0]
+
+    def image_to_string(self, image, config=''):
+        return data_to_text(self.image_to_data(image, config))
+
+def boxes_to_data(boxes):
+    """
+    EasyOCR (corner points, text, prob) boxes -> pytesseract DICT shape, one
+    word per box; boxes overlapping vertically form one line, left to right.
+    """
+    items = []
+    for points, text, prob in boxes:
+        xs = [int(p[0]) for p in points]
+        ys = [int(p[1]) for p in points]
+        items.append((min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys), text, prob))
+
+    lines = []
+    for item in sorted(items, key=lambda item: item[1] + item[3] / 2):
+        center = item[1] + item[3] / 2
+        if lines and lines[-1]['top'] <= center <= lines[-1]['bottom']:
+            lines[-1]['items'].append(item)
+        else:
+            lines.append({'top': item[1], 'bottom': item[1] + item[3], 'items': [item]})
+
+    data = {field: [] for field in TSV_FIELDS}
+    for line_num, line in enumerate(lines, 1):
+        for word_num, (left, top, width, height, text, prob) in enumerate(
+                sorted(line['items']), 1):
+            for field, value in zip(TSV_FIELDS, (5, 1, 1, 1, line_num, word_num, left, top,
+                                                 width, height, round(float(prob) * 100, 2), text)):
+                data[field].append(value)
+    return data
+
+def data_to_text(data):
+    """image_to_data dict -> text with one line per (block, par, line), like image_to_string."""
+    lines = {}
+    for i, text in enumerate(data['text']):
+        if data['level'][i] == 5 and text.strip():
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            lines.setdefault(key, []).append(text.strip())
+    return '\n'.join(' '.join(words) for words in lines.values())
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def get_backend():
+    """The process-wide OCR backend, created on first use."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            choice = os.environ.get('OCR_BACKEND', 'auto')
+            if choice == 'auto':
+                try:
+                    _backend = TesserocrBackend() if importlib.util.find_spec('tesserocr') else None
+                except ValueError:
+                    # tesserocr's signal setup only works when first imported on the
+                    # main thread (not inside a Streamlit script or a worker thread)
+                    _backend = None
+                _backend = _backend or PytesseractBackend()
+            else:
+                backends = {'tesserocr': TesserocrBackend, 'easyocr': EasyOcrBackend}
+                _backend = backends.get(choice, PytesseractBackend)()
+    return _backend
+
+# -------------------------------------------------------------------------
+# Catalog user dictionary: the --user-words / --user-patterns files written
+# by CSV_scrap_chpstBRND.py, added to every Tesseract call once set. Also
+# picked up from OCR_USER_WORDS / OCR_USER_PATTERNS, so pool workers get it.
+# ETL / bench only for now: the apps don't set it, it showed no matching gain
+# (bench/bench_user_dictionary.py) and the Streamlit fallback to pytesseract
+# can't pass a path with spaces on Windows.
+# User-patterns only go to --oem 0 (legacy) configs: with the LSTM engine
+# (Tesseract 5.5) any patterns file aborts Recognize() on some line crops,
+# taking the whole process down.
+# -------------------------------------------------------------------------
+_user_dictionary = {}
+
+def use_user_dictionary(words_path=None, patterns_path=None):
+    """
+    Makes Tesseract prefer catalog words (and, on the legacy engine,
+    strength formats) from now on. Missing files are skipped; no paths
+    turns the dictionary off. Returns the flags set.
+    """
+    _user_dictionary.clear()
+    for flag, path in (('--user-words', words_path), ('--user-patterns', patterns_path)):
+        if path and os.path.isfile(path):
+            _user_dictionary[flag] = path
+    return dict(_user_dictionary)
+
+def _dictionary_flags(config):
+    legacy = parse_config(config)[1] == 0
+    return [(flag, path) for flag, path in _user_dictionary.items() if legacy or flag != '--user-patterns']
+
+def _applied_dictionary_flags(config, backend):
+    if backend.name == 'easyocr':
+        return []
+    flags = []
+    for flag, path in _dictionary_flags(config):
+        if backend.name == 'pytesseract' and os.name == 'nt':
+            # pytesseract splits the config non-POSIX on Windows: quotes
+            # are passed through, so a path with a space can't be given
+            if ' ' in path:
+                warnings.warn(f'{flag} skipped, pytesseract cannot pass a path with spaces: {path}')
+                continue
+            flags.append(f'{flag} {path}')
+        else:
+            flags.append(f'{flag} {shlex.quote(path)}')
+    return flags
+
+def user_dictionary(config=''):
+    """
+    '--user-words path ...' the current backend actually gets with config
+    (cache keys, logs), '' when off or skipped.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return ' '.join(_applied_dictionary_flags(config, get_backend()))
+
+def _with_user_dictionary(config, backend):
+    flags = _applied_dictionary_flags(config, backend)
+    return ' '.join([config] + flags) if flags else config
+
+use_user_dictionary(os.environ.get('OCR_USER_WORDS'), os.environ.get('OCR_USER_PATTERNS'))
+
+def warm_up(config=''):
+    """Loads the engines for config now (no-op for pytesseract), so the first upload isn't slow."""
+    backend = get_backend()
+    if hasattr(backend, 'preload'):
+        backend.preload(_with_user_dictionary(config, backend))
+
+def images_to_data(images, config=''):
+    """image_to_data for a list of images; batched on backends that support it."""
+    backend = get_backend()
+    config = _with_user_dictionary(config, backend)
+    if hasattr(backend, 'images_to_data'):
+        return backend.images_to_data(images, config)
+    return [backend.image_to_data(image, config) for image in images]
+
+def image_to_string(image, config=''):
+    """Drop-in for pytesseract.image_to_string(image, config=...) on the active backend."""
+    backend = get_backend()
+    return backend.image_to_string(image, _with_user_dictionary(config, backend))
+
+def image_to_data(image, config=''):
+    """pytesseract.image_to_data(..., output_type=Output.DICT) on the active backend."""
+    backend = get_backend()
+    return backend.image_to_data(image, _with_user_dictionary(config, backend))
+
+# -------------------------------------------------------------------------
+# OCR helpers shared by the app versions
+# -------------------------------------------------------------------------
+
+def image_to_lines(image, config=''):
+    """
+    One Tesseract pass through image_to_data. Returns {'text': ..., 'lines': [...]}
+    where every line has its text, box [left, top, width, height] and the
+    mean word confidence; 'text' is the lines joined like image_to_string.
+    """
+    return data_to_lines(image_to_data(image, config))
+
+def images_to_lines(images, config=''):
+    """image_to_lines for a list of images, through the batched images_to_data."""
+    return [data_to_lines(data) for data in images_to_data(images, config)]
+
+def data_to_lines(data):
+    """image_to_data dict -> {'text', 'lines'} (see image_to_lines)."""
+    lines = {}
+    for i, word in enumerate(data['text']):
+        word = word.strip()
+        if not word:
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        left, top = data['left'][i], data['top'][i]
+        right, bottom = left + data['width'][i], top + data['height'][i]
+        line = lines.get(key)
+        if line is None:
+            line = lines[key] = {'words': [], 'confs': [], 'box': [left, top, right, bottom]}
+        line['words'].append(word)
+        line['confs'].append(float(data['conf'][i]))
+        box = line['box']
+        box[0], box[1] = min(box[0], left), min(box[1], top)
+        box[2], box[3] = max(box[2], right), max(box[3], bottom)
+
+    result_lines = []
+    for line in lines.values():
+        left, top, right, bottom = line['box']
+        result_lines.append({
+            'text': ' '.join(line['words']),
+            'box': [left, top, right - left, bottom - top],
+            'conf': sum(line['confs']) / len(line['confs']),
+        })
+
+    return {'text': '\n'.join(line['text'] for line in result_lines), 'lines': result_lines}
+
+def cached_ocr(image_bytes, image, config='', variant='raw', cache=None, reader=None):
+    """
+    image_to_lines() behind the disk cache: the same upload bytes with the
+    same config, preprocessing variant and backend are only OCR'd once. reader
+    swaps in another image -> {'text', 'lines'} function (e.g. layout_ocr);
+    give it its own variant name.
+    """
+    read = reader or (lambda image: image_to_lines(image, config))
+    if cache is None:
+        return read(image)
+
+    key = _cache_key(image_bytes, config, variant)
+    result = cache.get(key)
+    if result is None:
+        result = read(image)
+        cache.put(key, result)
+    return result
+
+def cached_ocr_many(items, config='', cache=None):
+    """
+    cached_ocr for several (image_bytes, image, variant) items: the cache
+    misses go through images_to_lines together, so EasyOCR recognizes
+    their line crops in one pass. Results in item order.
+    """
+    if not items:
+        return []
+    if cache is None:
+        return images_to_lines([image for _, image, _ in items], config)
+
+    keys = [_cache_key(image_bytes, config, variant) for image_bytes, _, variant in items]
+    results = [cache.get(key) for key in keys]
+    missing = [n for n, result in enumerate(results) if result is None]
+    if missing:
+        for n, result in zip(missing, images_to_lines([items[n][1] for n in missing], config)):
+            results[n] = result
+            cache.put(keys[n], result)
+    return results
+
+def _cache_key(image_bytes, config, variant):
+    # a reading with the catalog dictionary is not the reading without it, and
+    # an EasyOCR reading is not a Tesseract one (the cache file is shared)
+    return cache_key(image_bytes, ' '.join(filter(None, [config, user_dictionary(config)])), variant,
+                     get_backend().name)
@@ -0,0 +1,88 @@
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+import numpy as np
+from PIL import Image
+
+# -------------------------------------------------------------------------
+# Preprocessing engine for big phone photos: downscale to OCR resolution,
+# then denoise + adaptive threshold tile by tile
+# -------------------------------------------------------------------------
+MAX_SIDE = 2480      # A5 at 300 DPI; Tesseract gains nothing from more pixels
+TILE = 512
+# fastNlMeans reads 21//2 + 7//2 = 13 px around a pixel, the 11x11 threshold
+# another 5 on top of that; with this margin every tile's interior comes out
+# exactly as if the whole image had been processed at once
+MARGIN = 24
+# JPEG can only be decoded at 1/2, 1/4, 1/8 scale: a 12 MP photo's 4032 px
+# side halves to 2016, ~240 DPI on A5, which Tesseract reads just as well
+REDUCE_SLACK = 0.8
+
+def downscale_for_ocr(gray, max_side=MAX_SIDE):
+    """Shrinks (never enlarges) so the longer side is at most max_side."""
+    height, width = gray.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return gray
+    return cv2.resize(gray, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+
+def decode_upload(image_bytes, max_side=MAX_SIDE, slack=REDUCE_SLACK):
+    """
+    Uploaded JPEG/PNG bytes -> grayscale uint8 array at OCR resolution, with
+    no PIL image, RGB copy or re-encode in between. The size comes from the
+    header; JPEGs are then decoded at 1/2, 1/4 or 1/8 scale in the DCT
+    (cv2.IMREAD_REDUCED_GRAYSCALE_*), the largest reduction that keeps the
+    long side above slack * max_side. EXIF orientation is applied by OpenCV.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as header:
+        long_side = max(header.size)
+    flag = cv2.IMREAD_GRAYSCALE
+    for factor, reduced in ((8, cv2.IMREAD_REDUCED_GRAYSCALE_8), (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+                            (2, cv2.IMREAD_REDUCED_GRAYSCALE_2)):
+        if long_side / factor >= slack * max_side:
+            flag = reduced
+            break
+    gray = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), flag)
+    if gray is None:
+        raise ValueError("not a decodable image")
+    return downscale_for_ocr(gray, max_side)
+
+def _denoise_threshold(tile, h=30, template=7, search=21):
+    tile = cv2.fastNlMeansDenoising(tile, None, h, template, search)
+    return cv2.adaptiveThreshold(tile, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+def tiled_denoise_threshold(gray, tile=TILE, margin=MARGIN, workers=None):
+    """
+    ts4's denoise + adaptive threshold over overlapping tiles on a thread
+    pool (OpenCV releases the GIL). Each tile is processed with `margin`
+    extra pixels and only its interior is written back, so the stitched
+    result has no seams. At most 2 tiles per worker are in flight, which
+    bounds the extra memory to a few tile-sized buffers.
+    """
+    height, width = gray.shape
+    out = np.empty_like(gray)
+    workers = workers or os.cpu_count() or 1
+    jobs = [(y, x) for y in range(0, height, tile) for x in range(0, width, tile)]
+
+    def run(job):
+        y, x = job
+        y0, x0 = max(y - margin, 0), max(x - margin, 0)
+        y1, x1 = min(y + tile + margin, height), min(x + tile + margin, width)
+        done = _denoise_threshold(np.ascontiguousarray(gray[y0:y1, x0:x1]))
+        out[y:y + tile, x:x + tile] = done[y - y0:y - y0 + tile, x - x0:x - x0 + tile]
+
+    with ThreadPoolExecutor(workers) as pool:
+        for start in range(0, len(jobs), 2 * workers):
+            list(pool.map(run, jobs[start:start + 2 * workers]))
+    return out
+
+def preprocess_photo(image, max_side=MAX_SIDE, workers=None):
+    """
+    Drop-in for ts4's preprocess_image on large photos: grayscale, downscale
+    to OCR resolution, then the tiled denoise + adaptive threshold.
+    """
+    img = np.array(image)
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_RGBA2GRAY if img.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+    return tiled_denoise_threshold(downscale_for_ocr(img, max_side), workers=workers)
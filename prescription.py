@@ -0,0 +1,218 @@
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import cv2
+import numpy as np
+
+import ocr_engine
+from catalog import cheapest_alternative
+from preprocess import preprocess_photo
+
+# -------------------------------------------------------------------------
+# Prescription pipeline pieces shared by the Flask app and the batch CLI
+# -------------------------------------------------------------------------
+
+def preprocess_image(image):
+    """Grayscale + Otsu threshold, same as tsrct3 uses before OCR."""
+    img = np.array(image)
+    if img.ndim == 3:
+        gray = cv2.cvtColor(img, cv2.COLOR_RGBA2GRAY if img.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+    else:
+        gray = img
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+def preprocess_heavy(image):
+    """ts4's pipeline: denoise + adaptive threshold. Slow, better on shadowed photos."""
+    img = np.array(image)
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    gray = cv2.fastNlMeansDenoising(gray, None, 30, 7, 21)
+    return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+
+def is_medication_line(line):
+    return bool(extract_medications(line))
+
+def extract_medications(text):
+    """Extract medication-related lines from OCR text"""
+    medications = []
+
+    for line in text.splitlines():
+        line = line.strip()
+
+        # Ignore empty lines
+        if not line:
+            continue
+
+        # Rule 1: dosage pattern (mg, ml, mcg, g, iu)
+        if re.search(r"\b\d+\s?(mg|ml|mcg|g|iu)\b", line.lower()):
+            medications.append(line)
+
+        # Rule 2: tablet/capsule keywords
+        elif re.search(r"\b(tab|tablet|cap|capsule|syrup|inj|injection)\b", line.lower()):
+            medications.append(line)
+
+        # Rule 3: Common medication patterns (optional, can be expanded)
+        elif re.search(r"\b(advil|tylenol|aspirin|ibuprofen|amoxicillin|metformin)\b", line.lower()):
+            medications.append(line)
+
+    return medications
+
+def match_medications(medications, catalog, matcher, score_cutoff=60):
+    """
+    Matches each medication line to the catalog, with price and cheapest brand.
+    matcher is a CatalogMatcher over catalog.keys() (same pick as extractOne).
+    """
+    matches = []
+
+    for line in medications:
+        match_result = matcher.match_one(line, score_cutoff=score_cutoff)
+        if not match_result:
+            continue
+
+        best_match, score = match_result
+        data = catalog[best_match]
+        cheapest = cheapest_alternative(data['generic_name'], catalog.generic_index)
+        matches.append({
+            "line": line,
+            "brand": best_match,
+            "score": score,
+            "price": data['price'],
+            "cheapest": cheapest if cheapest and cheapest[1] < data['price'] else None,
+        })
+
+    return matches
+
+# -------------------------------------------------------------------------
+# OCR cascade: fast pass on the whole page, heavy pass only where it's weak
+# -------------------------------------------------------------------------
+FAST_CONFIG = '--psm 6 -l eng'
+HEAVY_CONFIG = '--oem 1 --psm 7 -l eng'
+
+def cascade_ocr(image, matcher, min_conf=30, score_cutoff=60, pad=6):
+    """
+    Otsu + Tesseract on the page first. Lines with a mean word confidence
+    below min_conf, or medication lines whose catalog match scores under
+    score_cutoff, are cropped and re-read with preprocess_heavy (single-line
+    PSM); the heavy reading replaces the fast one when it matches the
+    catalog better, or is more confident when neither matches.
+    Returns {'text', 'lines', 'stats'}; stats count the lines and pixels
+    that went through the heavy path.
+    """
+    gray = np.array(image)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+    fast = ocr_engine.image_to_lines(preprocess_image(gray), FAST_CONFIG)
+
+    def score(text):
+        result = matcher.match_one(text, score_cutoff=0) if text.strip() else None
+        return result[1] if result else 0
+
+    height, width = gray.shape
+    lines, rerun, heavy_pixels = [], 0, 0
+    for line in fast['lines']:
+        line = dict(line, source='fast')
+        medication = is_medication_line(line['text'])
+        fast_score = score(line['text']) if medication else None
+        if line['conf'] >= min_conf and (not medication or fast_score >= score_cutoff):
+            lines.append(line)
+            continue
+
+        left, top, box_width, box_height = line['box']
+        x0, y0 = max(left - pad, 0), max(top - pad, 0)
+        x1, y1 = min(left + box_width + pad, width), min(top + box_height + pad, height)
+        crop = gray[y0:y1, x0:x1]
+        rerun += 1
+        heavy_pixels += crop.size
+        heavy = ocr_engine.image_to_lines(preprocess_heavy(crop), HEAVY_CONFIG)['lines']
+        if not heavy:
+            lines.append(line)
+            continue
+
+        text = ' '.join(part['text'] for part in heavy)
+        conf = sum(part['conf'] for part in heavy) / len(heavy)
+        heavy_score = score(text) if medication or is_medication_line(text) else None
+        if heavy_score is not None and fast_score is not None and heavy_score != fast_score:
+            better = heavy_score > fast_score
+        else:
+            better = conf > line['conf']
+        if better:
+            line.update(text=text, conf=conf, source='heavy')
+        lines.append(line)
+
+    return {
+        'text': '\n'.join(line['text'] for line in lines),
+        'lines': lines,
+        'stats': {'lines': len(lines),
+                  'rerun_lines': rerun,
+                  'replaced_lines': sum(1 for line in lines if line['source'] == 'heavy'),
+                  'heavy_pixel_share': heavy_pixels / gray.size},
+    }
+
+# -------------------------------------------------------------------------
+# OCR race: a few page-segmentation modes x binarizations run concurrently,
+# the reading that matches the catalog best wins
+# -------------------------------------------------------------------------
+RACE_PSMS = (6, 4, 11)
+RACE_VARIANTS = ('otsu', 'adaptive')
+
+def catalog_score(text, matcher, score_cutoff=60):
+    """(matched lines, their summed scores, medication lines) for one OCR reading."""
+    medications = extract_medications(text)
+    scores = [result[1] for result in (matcher.match_one(line, score_cutoff=score_cutoff)
+                                       for line in medications) if result]
+    return len(scores), sum(scores), len(medications)
+
+def race_ocr(image, matcher, psms=RACE_PSMS, variants=RACE_VARIANTS, config='-l eng',
+             score_cutoff=60, target=6, workers=None):
+    """
+    Runs every psm x variant ('otsu' = preprocess_image, 'adaptive' = the
+    tiled denoise + adaptive threshold) on a thread pool and returns the
+    reading with the most medication lines matching the catalog (ties: the
+    higher summed score). Once a reading has `target` matched lines (None:
+    never) the configs still queued are cancelled and it is returned;
+    Tesseract calls already running finish in the background. Nearly every
+    medication-like line clears score_cutoff on some brand, so the target
+    is a line count rather than a matched share.
+    Returns {'text', 'psm', 'variant', 'matched', 'stats'}.
+    """
+    gray = np.array(image)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+    binarize = {'otsu': preprocess_image, 'adaptive': preprocess_photo}
+    binarized, locks = {}, {variant: threading.Lock() for variant in variants}
+
+    def run(psm, variant):
+        start = time.perf_counter()
+        # each binarization is made once, by whichever run needs it first
+        with locks[variant]:
+            if variant not in binarized:
+                binarized[variant] = binarize[variant](gray)
+        text = ocr_engine.image_to_string(binarized[variant], f'--psm {psm} {config}')
+        return text, catalog_score(text, matcher, score_cutoff), time.perf_counter() - start
+
+    # variant-major: the cheap Otsu readings get the first workers
+    runs = [(psm, variant) for variant in variants for psm in psms]
+    pool = ThreadPoolExecutor(workers or os.cpu_count() or 1)
+    futures = {pool.submit(run, psm, variant): (psm, variant) for psm, variant in runs}
+    best, finished = None, []
+    try:
+        for future in as_completed(futures):
+            text, (matched, total_score, _), seconds = future.result()
+            psm, variant = futures[future]
+            finished.append({'psm': psm, 'variant': variant, 'matched': matched, 'seconds': seconds})
+            if best is None or (matched, total_score) > best[0]:
+                best = ((matched, total_score), text, psm, variant)
+            if target is not None and matched >= target:
+                break
+    finally:
+        cancelled = sum(future.cancel() for future in futures)
+        pool.shutdown(wait=False)
+
+    (matched, _), text, psm, variant = best
+    return {
+        'text': text, 'psm': psm, 'variant': variant, 'matched': matched,
+        'stats': {'runs': len(runs), 'finished': len(finished), 'cancelled': cancelled,
+                  'readings': finished},
+    }
@@ -0,0 +1,118 @@
+import time
+import cv2
+import numpy as np
+
+from preprocess import downscale_for_ocr, preprocess_photo
+
+# -------------------------------------------------------------------------
+# Image-quality gate before OCR: a few cheap measurements on a small copy
+# decide whether an upload is worth reading, whether to enhance it first,
+# and whether plain Otsu is enough or it needs denoise + adaptive threshold
+# -------------------------------------------------------------------------
+ANALYSIS_SIDE = 1024     # measurements run on a copy this size (a few ms)
+CHAR_HEIGHT_MM = 2.5     # cap height of ~10 pt print, to turn pixels into DPI
+
+# thresholds picked on the sample prescriptions and blurred/dark/shrunk/noisy
+# copies of them (bench/bench_quality_gate.py)
+MIN_BLUR = 15            # Laplacian variance below this: text edges are gone
+MIN_DPI = 60             # characters too small to read even after upscaling
+LOW_DPI = 150            # readable, but upscaled to this first
+MIN_INK = 0.005          # share of ink pixels: below this there is no text
+MAX_INK = 0.5            # above this the page is a dark mess, not text on paper
+MIN_CONTRAST = 40        # p95 - p5 gray levels; below this stretch with CLAHE
+MAX_DARK = 0.5           # share of crushed-black pixels: badly under-exposed
+MAX_NOISE = 4.0          # sensor noise sigma Otsu still copes with
+MAX_UNEVEN = 100         # background brightness spread (shadows, desk around the page)
+
+def _noise_sigma(gray):
+    """Immerkaer's fast noise estimate: one 3x3 filter and a mean."""
+    kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+    response = cv2.filter2D(gray.astype(np.float32), -1, kernel)
+    height, width = gray.shape
+    return float(np.abs(response[1:-1, 1:-1]).sum() * np.sqrt(np.pi / 2) / (6 * (width - 2) * (height - 2)))
+
+def _percentiles(gray, *qs):
+    """Gray-level percentiles from a 256-bin histogram (no sort)."""
+    cumulative = np.cumsum(cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel())
+    return [int(np.searchsorted(cumulative, q / 100 * cumulative[-1])) for q in qs]
+
+def _char_height(ink):
+    """Median height (px) of character-sized connected components, or None."""
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    heights = stats[1:, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:, cv2.CC_STAT_WIDTH]
+    # drop specks, rules and blobs; keep things shaped like glyphs
+    glyphs = heights[(heights >= 4) & (heights <= ink.shape[0] // 10) & (widths <= 3 * heights)]
+    if len(glyphs) < 10:
+        return None
+    return float(np.median(glyphs))
+
+def check_quality(gray):
+    """
+    Measures a grayscale page and returns a report dict: the measurements,
+    'problems' (reasons to reject), 'enhance' (fixes to apply before OCR),
+    'variant' ('otsu' or 'heavy'), 'ok' and the time it took in 'ms'.
+    """
+    start = time.perf_counter()
+    small = downscale_for_ocr(gray, ANALYSIS_SIDE)
+    scale = max(gray.shape) / max(small.shape)
+
+    low, high = _percentiles(small, 5, 95)
+    dark = float(np.count_nonzero(small <= 5) / small.size)
+    noise = _noise_sigma(small)
+    # edges and ink are judged on a contrast-stretched copy, so a dim photo
+    # counts as fixable rather than empty
+    small = cv2.normalize(small, None, 0, 255, cv2.NORM_MINMAX)
+    blur = float(cv2.meanStdDev(cv2.Laplacian(small, cv2.CV_64F))[1][0, 0] ** 2)
+    # background: the page with the text closed away, then its brightness spread
+    background = cv2.morphologyEx(small, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15)))
+    background = cv2.resize(background, (32, 32), interpolation=cv2.INTER_AREA)
+    low_bg, high_bg = _percentiles(background, 10, 90)
+    uneven = float(high_bg - low_bg)
+
+    ink = cv2.adaptiveThreshold(small, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 25, 15)
+    density = float(np.count_nonzero(ink) / ink.size)
+    char_height = _char_height(ink)
+    dpi = char_height * scale * 25.4 / CHAR_HEIGHT_MM if char_height else None
+
+    problems, enhance = [], []
+    if density < MIN_INK:
+        problems.append("no text found")
+    elif density > MAX_INK:
+        problems.append("too dark to separate text from paper")
+    if blur < MIN_BLUR:
+        problems.append("too blurry")
+    if dark > MAX_DARK:
+        problems.append("too dark")
+    if dpi is not None and dpi < MIN_DPI:
+        problems.append("text too small, take the photo closer")
+    elif dpi is not None and dpi < LOW_DPI:
+        enhance.append('upscale')
+    if high - low < MIN_CONTRAST:
+        enhance.append('contrast')
+
+    return {
+        'blur': blur, 'contrast': high - low, 'dark': dark, 'noise': noise,
+        'uneven': uneven, 'ink': density, 'dpi': dpi,
+        'problems': problems, 'enhance': enhance,
+        'variant': 'heavy' if noise > MAX_NOISE or uneven > MAX_UNEVEN else 'otsu',
+        'ok': not problems,
+        'ms': (time.perf_counter() - start) * 1000,
+    }
+
+def enhance_image(gray, report):
+    """Applies the report's fixes: CLAHE for flat contrast, upscaling for small print."""
+    if 'contrast' in report['enhance']:
+        gray = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+    if 'upscale' in report['enhance']:
+        factor = min(LOW_DPI / report['dpi'], 2.0)
+        gray = cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+    return gray
+
+def prepare_for_ocr(gray, report):
+    """Enhanced page binarized with the cheapest variant the report allows."""
+    gray = enhance_image(gray, report)
+    if report['variant'] == 'heavy':
+        return preprocess_photo(gray)
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
@@ -1,38 +1,128 @@
-from flask import Flask, request, render_template
-from PIL import Image
+from flask import Flask, Response, jsonify, request, render_template
 import pytesseract
-import re
+import json
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import shared_catalog
+from job_queue import JobQueue, QueueFull, start_workers
+from matching import CatalogMatcher
+from ocr_cache import OcrCache
+from ocr_engine import cached_ocr, cached_ocr_many, get_backend, warm_up
+from prescription import extract_medications, match_medications
+from preprocess import decode_upload
+from quality import check_quality, prepare_for_ocr
 
 app = Flask(__name__)
 
 # Configure Tesseract path for macOS
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
-def extract_medications(text):
-    """Extract medication-related lines from OCR text"""
-    medications = []
+# Loaded once per worker process. The snapshot is memory-mapped, so N workers
+# share one copy of the catalog pages instead of N parsed CSVs.
+SNAPSHOT_PATH = r'F:\pybls\csv files\formatted_medicines_v3.snapshot'
+CSV_PATH = r'F:\pybls\csv files\formatted_medicines_v3.csv'
+# Without the catalog files the app still serves OCR results, just no matches
+try:
+    catalog = shared_catalog(SNAPSHOT_PATH, CSV_PATH)
+    # trigram candidates + WRatio per line instead of an extractOne over every key
+    matcher = CatalogMatcher(catalog.keys())
+except OSError as e:
+    print(f"Catalog not available ({e}), serving OCR-only results")
+    catalog = matcher = None
+
+# Same OCR cache file as the Streamlit app: repeat uploads skip Tesseract.
+# analyze() runs appFNL's default path (quality gate, gate-<variant> key),
+# so a scan read in either front end is reused by the other
+ocr_cache = OcrCache()
+
+# With the in-process backend, load the Tesseract engines before the first request
+warm_up()
+
+def gate(image_bytes):
+    """Quality gate: (preprocessed page, cache variant), or ValueError for an unreadable photo."""
+    gray = decode_upload(image_bytes)
+    report = check_quality(gray)
+    if not report['ok']:
+        raise ValueError(f"can't read this photo: {', '.join(report['problems'])}")
+    return prepare_for_ocr(gray, report), f"gate-{report['variant']}"
 
-    for line in text.splitlines():
-        line = line.strip()
+def result_for(extracted_text):
+    """OCR text -> medication lines + catalog matches (none without a catalog)."""
+    medications = extract_medications(extracted_text)
+    return {"full_text": extracted_text,
+            "medications": medications,
+            "matches": match_medications(medications, catalog, matcher) if catalog is not None else []}
 
-        # Ignore empty lines
-        if not line:
-            continue
+def analyze(image_bytes):
+    """Runs on a queue worker: quality gate -> OCR -> medication lines -> catalog matches."""
+    page, variant = gate(image_bytes)
+    return result_for(cached_ocr(image_bytes, page, variant=variant, cache=ocr_cache)['text'])
 
-        # Rule 1: dosage pattern (mg, ml, mcg, g, iu)
-        if re.search(r"\b\d+\s?(mg|ml|mcg|g|iu)\b", line.lower()):
-            medications.append(line)
+def analyze_batch(images):
+    """
+    analyze() for several queued uploads with one OCR call for all of them;
+    a failed upload gets its exception in place of a result.
+    """
+    results, readable = [None] * len(images), []
+    for n, image_bytes in enumerate(images):
+        try:
+            readable.append((n, image_bytes) + gate(image_bytes))
+        except Exception as e:
+            results[n] = e
+    readings = cached_ocr_many([item[1:] for item in readable], cache=ocr_cache)
+    for (n, *_), reading in zip(readable, readings):
+        try:
+            results[n] = result_for(reading['text'])
+        except Exception as e:
+            results[n] = e
+    return results
 
-        # Rule 2: tablet/capsule keywords
-        elif re.search(r"\b(tab|tablet|cap|capsule|syrup|inj|injection)\b", line.lower()):
-            medications.append(line)
+# OCR runs on a bounded pool of worker threads fed from a SQLite queue, so a
+# slow image never blocks other requests; a full queue rejects new uploads.
+# Backends with a batched images_to_data (EasyOCR) take up to OCR_BATCH_SIZE
+# queued jobs per OCR call instead of one.
+jobs = JobQueue(max_pending=int(os.environ.get('OCR_MAX_PENDING', 32)))
+start_workers(jobs, analyze, workers=int(os.environ.get('OCR_WORKERS', os.cpu_count() or 1)),
+              batch_handler=analyze_batch if hasattr(get_backend(), 'images_to_data') else None,
+              batch_size=int(os.environ.get('OCR_BATCH_SIZE', 8)))
 
-        # Rule 3: Common medication patterns (optional, can be expanded)
-        elif re.search(r"\b(advil|tylenol|aspirin|ibuprofen|amoxicillin|metformin)\b", line.lower()):
-            medications.append(line)
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Queues an uploaded image: 202 + job id, or 503 + Retry-After when full."""
+    file = request.files.get("file")
+    if not file:
+        return jsonify(error="No file uploaded."), 400
+    try:
+        job_id = jobs.submit(file.read())
+    except QueueFull as e:
+        response = jsonify(error=f"Server busy: {e}. Try again shortly.")
+        response.headers["Retry-After"] = "5"
+        return response, 503
+    return jsonify(job_id=job_id, status_url=f"/jobs/{job_id}"), 202
 
-    return medications
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    """Poll a job: status, queue position, and the result once done."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify(error="Unknown job."), 404
+    return jsonify(job)
+
+@app.route("/jobs/<job_id>/stream")
+def job_stream(job_id):
+    """Server-sent events: a status event while waiting, then the finished job."""
+    def events():
+        while True:
+            job = jobs.wait(job_id, timeout=15)
+            if job is None:
+                yield 'event: error\ndata: {"error": "Unknown job."}\n\n'
+                return
+            yield f"data: {json.dumps(job)}\n\n"
+            if job['status'] in ('done', 'failed'):
+                return
+    return Response(events(), mimetype="text/event-stream")
 
 @app.route("/", methods=["GET", "POST"])
 def home():
@@ -40,16 +130,17 @@ def home():
         file = request.files.get("file")
         if file and file.filename.lower().endswith('.png'):
             try:
-                image = Image.open(file.stream).convert("RGB")
-                extracted_text = pytesseract.image_to_string(image)
-                medications = extract_medications(extracted_text)
-                return render_template("result.html",
-                                     full_text=extracted_text,
-                                     medications=medications)
-            except Exception as e:
+                job = jobs.wait(jobs.submit(file.read()), timeout=120)
+            except QueueFull:
                 return render_template("result.html",
-                                     error=f"Error processing image: {str(e)}",
+                                     error="Server is busy, please try again in a moment.",
                                      medications=[])
+            if job['status'] == 'done':
+                return render_template("result.html", **job['result'])
+            error = job['error'] or "Still processing, please try again."
+            return render_template("result.html",
+                                 error=f"Error processing image: {error}",
+                                 medications=[])
         else:
             return render_template("result.html",
                                  error="Please upload a PNG file only.",
@@ -58,4 +149,4 @@ def home():
     return render_template("index.html")
 
 if __name__ == "__main__":
-    app.run(port=8001)
\ No newline at end of file
+    app.run(port=8001, threaded=True)
\ No newline at end of file
@@ -5,6 +5,10 @@ import cv2
 import numpy as np
 import re
 import pandas as pd
+from near_duplicates import NearDuplicateIndex
+import ocr_engine
+from preprocess import decode_upload
+from orientation import straighten
 
 # Point to Tesseract executable (Windows only)
 pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
@@ -13,8 +17,11 @@ def preprocess_image(image):
     """
     Standard preprocessing to make text sharp and remove shadows/noise.
     """
-    img = np.array(image)
-    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
+    gray = np.array(image)
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_RGB2GRAY)
+    # level tilted / sideways photos first, so one OCR pass is enough
+    gray = straighten(gray)
     _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
     return thresh
 
@@ -92,10 +99,17 @@ def parse_prescription_detailed(text):
     
     return medicines
 
+@st.cache_resource
+def load_duplicate_index():
+    # Perceptual hashes of earlier scans' Rx body, so a re-shot of the same
+    # paper (different crop/compression/lighting) can offer the earlier result
+    return NearDuplicateIndex()
+
 # -----------------------------------------------------------------------------
 # UI Layout
 # -----------------------------------------------------------------------------
 st.set_page_config(page_title="Rx Parser", layout="wide")
+duplicate_index = load_duplicate_index()
 st.title("💊 Prescription Medicine Extractor")
 st.markdown("Upload a prescription to extract medicine names and ignore the noise.")
 
@@ -111,16 +125,31 @@ with col2:
     if uploaded_file:
         st.subheader("Extracted Medicines")
         
+        # 1. Preprocess (straight from the upload bytes to a grayscale array
+        #    at OCR resolution)
+        processed_img = preprocess_image(decode_upload(uploaded_file.getvalue()))
+        
+        # 2. Near-duplicate of an earlier scan? Only offered: another patient's
+        #    sheet from the same pad can hash alike, so OCR stays the default
+        previous = duplicate_index.find(processed_img)
+        use_previous = previous is not None and st.checkbox(
+            f"♻️ Looks like a prescription scanned before ({previous[0]} bits apart). "
+            "Same paper? Tick to show the saved result instead of reading it again")
+        
         if st.button("Extract Medicines"):
             with st.spinner("Analyzing..."):
-                # 1. Preprocess
-                processed_img = preprocess_image(image)
-                
-                # 2. Run OCR
-                raw_text = pytesseract.image_to_string(processed_img, config='--psm 6 -l eng')
-                
-                # 3. Parse Logic (Using improved multi-rule extraction)
-                extracted_data = parse_prescription_detailed(raw_text)
+                if use_previous:
+                    _, extracted_data = previous
+                    raw_text = ""
+                    st.info("♻️ Showing the saved result of the earlier scan.")
+                else:
+                    # 3. Run OCR
+                    raw_text = ocr_engine.image_to_string(processed_img, config='--psm 6 -l eng')
+                    
+                    # 4. Parse Logic (Using improved multi-rule extraction)
+                    extracted_data = parse_prescription_detailed(raw_text)
+                    if extracted_data:
+                        duplicate_index.add(processed_img, extracted_data)
                 
                 if extracted_data:
                     df = pd.DataFrame(extracted_data)